@@ -4,4 +4,6 @@ set -u   # crash on missing env variables
 set -e   # stop on any error
 set -x   # print what we are doing
 
+# the backfill falls back to the BAG geosearch api without the boundaries
+python manage.py import_stadsdelen || echo "Importing the stadsdeel boundaries failed"
 python manage.py update_faulty_stadsdelen
@@ -1,41 +1,137 @@
 import logging
+import threading
+import time
 
 import requests
 from django.conf import settings
 from requests import RequestException
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from api.stadsdeel_cache import get_stadsdeel_cache
 from datasets.blackspots.models import Spot
 from import_process.util import get_stadsdeel
 
 logger = logging.getLogger(__name__)
 
 
+class CircuitBreaker:
+    """
+    Stops calls to an upstream after failure_threshold consecutive failures. After
+    reset_timeout seconds a single trial call is let through, which closes the
+    breaker again when it succeeds.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # let one trial call through, the others wait for its result
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("BAG geosearch circuit breaker opened")
+                self.opened_at = time.monotonic()
+
+
+def create_session() -> requests.Session:
+    retry = Retry(
+        total=settings.BAG_GEO_SEARCH_API_RETRIES,
+        # a read timeout is not retried, it would add another read timeout to the
+        # request that blocks the save of a spot
+        read=0,
+        backoff_factor=0.2,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=["GET"],
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_maxsize=10)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# shared by all threads, so connections to the api are kept alive between lookups
+session = create_session()
+circuit_breaker = CircuitBreaker(
+    failure_threshold=settings.BAG_GEO_SEARCH_API_FAILURE_THRESHOLD,
+    reset_timeout=settings.BAG_GEO_SEARCH_API_RESET_TIMEOUT,
+)
+
+
 class BagGeoSearchAPI:
     FEATURE_STADSDEEL = "gebieden/stadsdeel"
     FEATURE_ITEM_STADSDEEL = "stadsdeel"
 
     def get_stadsdeel(self, lat, lon):
+        cache = get_stadsdeel_cache()
+        stadsdeel = cache.get(lat, lon)
+        if stadsdeel is None:
+            stadsdeel = self.request_stadsdeel(lat, lon)
+            cache.set(lat, lon, stadsdeel)
+        return stadsdeel
+
+    def request_stadsdeel(self, lat, lon):
         url = settings.BAG_GEO_SEARCH_API_URL
 
+        if not circuit_breaker.allow():
+            logger.warning("BAG geosearch circuit breaker is open, skipping lookup")
+            return Spot.Stadsdelen.BagFout
+
         try:
-            response = requests.get(
+            response = session.get(
                 url,
                 params={
                     "item": BagGeoSearchAPI.FEATURE_ITEM_STADSDEEL,
                     "lon": lon,
                     "lat": lat,
                 },
+                timeout=(
+                    settings.BAG_GEO_SEARCH_API_CONNECT_TIMEOUT,
+                    settings.BAG_GEO_SEARCH_API_READ_TIMEOUT,
+                ),
             )
             response.raise_for_status()
             content = response.json()
             features = content.get("features", [])
+            stadsdeel = Spot.Stadsdelen.Geen
             for feature in features:
                 properties = feature.get("properties", {})
                 if properties.get("type") == BagGeoSearchAPI.FEATURE_STADSDEEL:
                     stadsdeel_code = properties.get("code")
-                    return get_stadsdeel(stadsdeel_code)
+                    stadsdeel = get_stadsdeel(stadsdeel_code)
+                    break
         except (RequestException, ValueError):
             logger.exception("Failed to get stadsdeel from lat/lon")
+            circuit_breaker.record_failure()
             return Spot.Stadsdelen.BagFout
 
-        return Spot.Stadsdelen.Geen
+        circuit_breaker.record_success()
+        return stadsdeel
@@ -0,0 +1,85 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.db.models import F
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from datasets.blackspots.models import DatasetVersion
+
+DATASET_VERSION_ID = 1
+
+
+def get_dataset_version() -> int:
+    return (
+        DatasetVersion.objects.filter(id=DATASET_VERSION_ID)
+        .values_list("version", flat=True)
+        .first()
+        or 0
+    )
+
+
+def get_request_dataset_version(request) -> int:
+    """
+    Read the version once per request, so the responses it caches and sends all
+    belong to the same version
+    """
+    if not hasattr(request, "dataset_version"):
+        request.dataset_version = get_dataset_version()
+    return request.dataset_version
+
+
+def increment_dataset_version():
+    """
+    Increment the version in the transaction of the change, so it is committed or
+    rolled back together with the data
+    """
+    updated = DatasetVersion.objects.filter(id=DATASET_VERSION_ID).update(
+        version=F("version") + 1
+    )
+    if not updated:
+        # start from the time, so a recreated version never repeats an earlier one
+        DatasetVersion.objects.get_or_create(
+            id=DATASET_VERSION_ID, defaults={"version": time.time_ns() // 1000}
+        )
+
+
+def get_dataset_etag(request) -> str:
+    key = "|".join(
+        [
+            str(get_request_dataset_version(request)),
+            request.path,
+            urlencode(sorted(request.query_params.lists()), doseq=True),
+            request.accepted_renderer.format,
+        ]
+    )
+    return quote_etag(hashlib.sha256(key.encode()).hexdigest())
+
+
+class DatasetVersionETagMixin:
+    """
+    Sends an ETag based on the dataset version with the list and retrieve
+    responses, and answers a matching If-None-Match with 304 without running the
+    queryset
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = get_dataset_etag(request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        # a compressed snapshot is the same content in another encoding, which a
+        # strong ETag may not be shared with, see api.snapshots
+        response["ETag"] = (
+            f"W/{etag}" if response.has_header("Content-Encoding") else etag
+        )
+        return response
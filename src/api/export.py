@@ -0,0 +1,66 @@
+from typing import Iterator
+
+from django.db.models import F, FloatField, Func
+
+from api.renderers import StreamingCSVRenderer
+from datasets.blackspots.models import Spot
+
+EXPORT_CHUNK_SIZE = 2000
+
+# csv column and the value it is read from, in the order of SpotCSVSerializer
+EXPORT_COLUMNS = [
+    ("stadsdeel", "stadsdeel"),
+    ("type", "spot_type"),
+    ("nummer", "locatie_id"),
+    ("locatie_omschrijving", "description"),
+    ("status", "status"),
+    ("actiehouders", "actiehouders"),
+    ("taken", "tasks"),
+    ("start_uitvoering", "start_uitvoering"),
+    ("eind_uitvoering", "eind_uitvoering"),
+    ("jaar_blackspotlijst", "jaar_blackspotlijst"),
+    ("jaar_ongeval_quickscan", "jaar_ongeval_quickscan"),
+    ("jaar_oplevering", "jaar_oplevering"),
+    ("jaar_opgenomen_in_ivm_lijst", "jaar_opgenomen_in_ivm_lijst"),
+    ("aantekeningen", "notes"),
+    ("latitude", "latitude"),
+    ("longitude", "longitude"),
+]
+
+# display names of the choices, like get_stadsdeel_display and get_status_display
+DISPLAY_VALUES = {
+    "stadsdeel": {value: str(label) for value, label in Spot.Stadsdelen.choices},
+    "status": {value: str(label) for value, label in Spot.StatusChoice.choices},
+}
+
+
+def get_export_rows(queryset) -> Iterator[list]:
+    """
+    Read the export columns of the spots with a server-side cursor, without creating
+    models or geometries
+    """
+    queryset = queryset.annotate(
+        latitude=Func(F("point"), function="ST_Y", output_field=FloatField()),
+        longitude=Func(F("point"), function="ST_X", output_field=FloatField()),
+    ).values_list(*[source for _column, source in EXPORT_COLUMNS])
+
+    displays = [
+        (index, DISPLAY_VALUES[source])
+        for index, (_column, source) in enumerate(EXPORT_COLUMNS)
+        if source in DISPLAY_VALUES
+    ]
+    for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row = list(row)
+        for index, choices in displays:
+            row[index] = choices.get(row[index], row[index])
+        yield row
+
+
+def render_spot_export(queryset) -> Iterator[str]:
+    """
+    Render the spots as csv lines, with the columns and dialect of SpotCSVSerializer
+    and StreamingCSVRenderer
+    """
+    return StreamingCSVRenderer().render_rows(
+        get_export_rows(queryset), [column for column, _source in EXPORT_COLUMNS]
+    )
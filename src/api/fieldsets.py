@@ -0,0 +1,44 @@
+from typing import Iterable, List, Optional, Set
+
+from rest_framework.exceptions import ValidationError
+
+
+def parse_field_names(
+    query_params, name: str, available: Set[str]
+) -> Optional[Set[str]]:
+    value = query_params.get(name)
+    if value is None:
+        return None
+
+    names = {
+        field_name.strip() for field_name in value.split(",") if field_name.strip()
+    }
+    unknown = names - available
+    if unknown:
+        raise ValidationError({name: [f"Unknown fields: {', '.join(sorted(unknown))}"]})
+    return names
+
+
+def get_fieldset(query_params, available: Iterable[str]) -> Optional[Set[str]]:
+    """
+    :param available: names of the fields of the serializer
+    :return: names of the fields selected by the comma separated fields and exclude
+    query parameters, None when they select every field
+    """
+    available = set(available)
+    fields = parse_field_names(query_params, "fields", available)
+    exclude = parse_field_names(query_params, "exclude", available)
+    if fields is None and exclude is None:
+        return None
+    return (available if fields is None else fields) - (exclude or set())
+
+
+def get_only_fields(
+    model, fieldset: Set[str], required: Iterable[str] = ()
+) -> List[str]:
+    """
+    :return: names of the model fields to load for the fieldset, with the primary key
+    and the required fields
+    """
+    names = {field.name for field in model._meta.concrete_fields}
+    return sorted((fieldset & names) | {model._meta.pk.name, *required})
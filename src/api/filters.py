@@ -0,0 +1,88 @@
+import math
+
+from django.contrib.gis.gdal import GDALException
+from django.contrib.gis.geos import GEOSException, GEOSGeometry, Point, Polygon
+from django.contrib.gis.measure import D
+from django.db.models import Q
+from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+
+from datasets.blackspots.models import Spot
+
+# geometry fields of a spot, a spot matches a spatial filter when any of them does
+SPOT_GEOMETRY_FIELDS = ["point", "polygoon", "wegvak"]
+
+# meters per degree of latitude, and of longitude at the equator
+METERS_PER_DEGREE = 111_320
+
+
+def parse_coordinates(value: str, count: int, name: str):
+    try:
+        coordinates = [float(coordinate) for coordinate in value.split(",")]
+    except ValueError:
+        coordinates = []
+    if len(coordinates) != count:
+        raise ValidationError({name: [f"Expected {count} comma separated numbers"]})
+    return coordinates
+
+
+def any_geometry(lookup: str, value) -> Q:
+    query = Q()
+    for field in SPOT_GEOMETRY_FIELDS:
+        query |= Q(**{f"{field}__{lookup}": value})
+    return query
+
+
+class SpotFilter(filters.FilterSet):
+    """
+    Spatial filters in WGS84 coordinates, backed by the spatial indexes on the
+    geometry fields:
+
+    - bbox=xmin,ymin,xmax,ymax: bounding box overlaps the box (&&)
+    - near=lon,lat&radius=meters: within radius meters of the point (ST_DWithin)
+    - within=<WKT or GeoJSON>: intersects the geometry (ST_Intersects)
+    """
+
+    bbox = filters.CharFilter(method="filter_bbox")
+    near = filters.CharFilter(method="filter_near")
+    radius = filters.NumberFilter(method="filter_radius")
+    within = filters.CharFilter(method="filter_within")
+
+    class Meta:
+        model = Spot
+        fields = ["stadsdeel", "bbox", "near", "radius", "within"]
+
+    def filter_bbox(self, queryset, name, value):
+        xmin, ymin, xmax, ymax = parse_coordinates(value, 4, name)
+        bbox = Polygon.from_bbox((xmin, ymin, xmax, ymax))
+        bbox.srid = 4326
+        return queryset.filter(any_geometry("bboverlaps", bbox))
+
+    def filter_near(self, queryset, name, value):
+        lon, lat = parse_coordinates(value, 2, name)
+        radius = self.form.cleaned_data.get("radius")
+        if radius is None or radius < 0:
+            raise ValidationError({"radius": ["A radius in meters is required"]})
+        radius = float(radius)
+
+        point = Point(lon, lat, srid=4326)
+        # ST_DWithin on the indexed geometries needs degrees, use the radius in
+        # degrees of longitude, which is the widest, and then the exact distance
+        degrees = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        return queryset.filter(any_geometry("dwithin", (point, degrees))).filter(
+            any_geometry("distance_lte", (point, D(m=radius)))
+        )
+
+    def filter_radius(self, queryset, name, value):
+        # applied by filter_near
+        return queryset
+
+    def filter_within(self, queryset, name, value):
+        try:
+            geometry = GEOSGeometry(value)
+        # malformed GeoJSON is parsed by GDAL
+        except (GDALException, GEOSException, ValueError):
+            raise ValidationError({name: ["Expected a WKT or GeoJSON geometry"]})
+        if geometry.srid is None:
+            geometry.srid = 4326
+        return queryset.filter(any_geometry("intersects", geometry))
@@ -0,0 +1,99 @@
+from collections import namedtuple
+from typing import Iterable, Optional
+
+from django.db import connection
+from rest_framework.exceptions import ValidationError
+
+from datasets.blackspots.models import GeneralizedGeometry, Spot
+
+Resolution = GeneralizedGeometry.Resolution
+FULL_RESOLUTION = "full"
+
+# tolerance of the simplification in degrees, about a pixel at the highest zoom
+# level the resolution is served for, and the digits after the decimal point of
+# the coordinates in the responses
+Level = namedtuple("Level", ["tolerance", "precision"])
+LEVELS = {
+    Resolution.low: Level(0.0005, 4),
+    Resolution.medium: Level(0.00005, 5),
+    Resolution.high: Level(0.00001, 6),
+}
+
+# highest zoom level served by each resolution, larger zoom levels get the full
+# geometries
+ZOOM_RESOLUTIONS = [
+    (11, Resolution.low),
+    (14, Resolution.medium),
+    (16, Resolution.high),
+]
+
+
+def get_resolution(query_params) -> Optional[str]:
+    """
+    :return: the resolution selected by the resolution or zoom query parameter,
+    None for the full geometries
+    """
+    resolution = query_params.get("resolution")
+    if resolution is not None:
+        if resolution == FULL_RESOLUTION:
+            return None
+        if resolution not in LEVELS:
+            raise ValidationError(
+                {"resolution": [f"Expected one of {', '.join(LEVELS)}, full"]}
+            )
+        return resolution
+
+    zoom = query_params.get("zoom")
+    if zoom is not None:
+        if not zoom.isdigit():
+            raise ValidationError({"zoom": ["Expected a zoom level"]})
+        for max_zoom, resolution in ZOOM_RESOLUTIONS:
+            if int(zoom) <= max_zoom:
+                return resolution
+    return None
+
+
+def get_precision(resolution: Optional[str]) -> Optional[int]:
+    return LEVELS[resolution].precision if resolution else None
+
+
+def round_coordinates(coordinates, precision: int):
+    if isinstance(coordinates, (list, tuple)):
+        return [round_coordinates(item, precision) for item in coordinates]
+    return round(coordinates, precision)
+
+
+def refresh_generalized_geometries(spot_ids: Optional[Iterable[int]] = None):
+    """
+    Recompute the generalized geometries of the spots at every resolution in the
+    database, or of all spots when spot_ids is None
+    """
+    table = GeneralizedGeometry._meta.db_table
+    delete_filter, spot_filter, params = "", "", []
+    if spot_ids is not None:
+        delete_filter = "WHERE spot_id = ANY(%s)"
+        spot_filter = "WHERE spot.id = ANY(%s)"
+        params = [list(spot_ids)]
+
+    levels = ", ".join(["(%s, %s::float)"] * len(LEVELS))
+    level_params = [
+        param
+        for resolution, level in LEVELS.items()
+        for param in (resolution, level.tolerance)
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} {delete_filter}", params)
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (spot_id, resolution, wegvak, polygoon)
+            SELECT
+                spot.id,
+                level.resolution,
+                ST_SimplifyPreserveTopology(spot.wegvak, level.tolerance),
+                ST_SimplifyPreserveTopology(spot.polygoon, level.tolerance)
+            FROM {Spot._meta.db_table} AS spot
+            CROSS JOIN (VALUES {levels}) AS level (resolution, tolerance)
+            {spot_filter}
+            """,
+            level_params + params,
+        )
@@ -0,0 +1,163 @@
+from typing import Iterator, Optional, Set
+
+from django.contrib.gis.db.models import GeometryField
+from django.db import connection
+
+from api.generalization import get_precision
+from datasets.blackspots.models import Document, GeneralizedGeometry, Spot
+
+# digits after the decimal point in the coordinates written by ST_AsGeoJSON
+GEOJSON_PRECISION = 15
+GEOJSON_CHUNK_SIZE = 500
+
+# properties that SpotGeojsonSerializer renders differently from the model field
+EXCLUDED_PROPERTY_FIELDS = ["id", "stadsdeel", "import_hash"]
+# spot geometries that are served generalized at the lower resolutions
+GENERALIZED_FIELDS = ["wegvak", "polygoon"]
+
+
+def get_stadsdeel_display_sql():
+    """
+    :return: sql and params of the stadsdeel display name, like get_stadsdeel_display
+    """
+    sql = "CASE spot.stadsdeel"
+    params = []
+    for value, label in Spot.Stadsdelen.choices:
+        sql += " WHEN %s THEN %s"
+        params += [value, str(label)]
+    return f"{sql} ELSE spot.stadsdeel END", params
+
+
+def get_column_sql(field, resolution: Optional[str]) -> str:
+    column = f"spot.{connection.ops.quote_name(field.column)}"
+    if resolution and field.name in GENERALIZED_FIELDS:
+        # the full geometry until the generalized ones are refreshed
+        return f"COALESCE(generalized.{field.column}, {column})"
+    return column
+
+
+def get_documents_sql() -> str:
+    """
+    :return: sql of the documents of the spot, in the shape of SpotDocumentSerializer,
+    with a parameter for the url of the document list
+    """
+    return f"""
+        COALESCE(
+            (
+                SELECT json_agg(
+                    json_build_object(
+                        '_links', json_build_object(
+                            'self', json_build_object(
+                                'href', %s || document.id || '/'
+                            )
+                        ),
+                        'id', document.id,
+                        'type', document.type,
+                        'filename', document.filename
+                    )
+                    ORDER BY document.id
+                )
+                FROM {Document._meta.db_table} AS document
+                WHERE document.spot_id = spot.id
+            ),
+            '[]'::json
+        )
+    """
+
+
+def get_property_sql(field, resolution: Optional[str]) -> str:
+    column = get_column_sql(field, resolution)
+    if isinstance(field, GeometryField):
+        precision = get_precision(resolution) or GEOJSON_PRECISION
+        return f"ST_AsGeoJSON({column}, {precision})::json"
+    return column
+
+
+def get_spot_features_sql(
+    queryset,
+    documents_url: str,
+    resolution: Optional[str] = None,
+    fieldset: Optional[Set[str]] = None,
+):
+    """
+    :param resolution: serve the generalized geometries of this resolution, see
+    api.generalization
+    :param fieldset: names of the properties to select, see api.fieldsets
+    :return: sql and params that select every spot in the queryset as a GeoJSON
+    feature, in the shape of SpotGeojsonSerializer
+    """
+    spot_sql, spot_params = queryset.values("id").query.sql_with_params()
+
+    def selected(name):
+        return fieldset is None or name in fieldset
+
+    properties, property_params = [], []
+    if selected("stadsdeel"):
+        stadsdeel_sql, stadsdeel_params = get_stadsdeel_display_sql()
+        properties.append(f"'stadsdeel', {stadsdeel_sql}")
+        property_params += stadsdeel_params
+    if selected("documents"):
+        properties.append(f"'documents', {get_documents_sql()}")
+        property_params.append(documents_url)
+    for field in Spot._meta.concrete_fields:
+        if field.name not in EXCLUDED_PROPERTY_FIELDS and selected(field.name):
+            properties.append(f"'{field.name}', {get_property_sql(field, resolution)}")
+
+    precision = get_precision(resolution) or GEOJSON_PRECISION
+    polygoon_sql = get_column_sql(Spot._meta.get_field("polygoon"), resolution)
+    generalized_sql, generalized_params = "", []
+    if resolution:
+        generalized_sql = f"""
+            LEFT JOIN {GeneralizedGeometry._meta.db_table} AS generalized
+                ON generalized.spot_id = spot.id AND generalized.resolution = %s
+        """
+        generalized_params = [resolution]
+
+    sql = f"""
+        SELECT json_build_object(
+            'id', spot.id,
+            'type', 'Feature',
+            'geometry', CASE
+                WHEN spot.polygoon IS NOT NULL THEN ST_AsGeoJSON(
+                    ST_MakePolygon(ST_ExteriorRing({polygoon_sql})), {precision}
+                )::json
+                WHEN spot.point IS NOT NULL THEN ST_AsGeoJSON(
+                    spot.point, {precision}
+                )::json
+            END,
+            'properties', json_build_object(
+                {", ".join(properties)}
+            )
+        )::text
+        FROM {Spot._meta.db_table} AS spot
+        {generalized_sql}
+        WHERE spot.id IN ({spot_sql})
+        ORDER BY spot.id
+    """
+    return sql, property_params + generalized_params + list(spot_params)
+
+
+def stream_spot_geojson(
+    queryset,
+    documents_url: str,
+    resolution: Optional[str] = None,
+    fieldset: Optional[Set[str]] = None,
+) -> Iterator[str]:
+    """
+    Stream the spots as a GeoJSON FeatureCollection built by the database, without
+    creating models or geometries in Python.
+
+    :param documents_url: absolute url of the document list, the links to the
+    documents are made by appending their id
+    """
+    sql, params = get_spot_features_sql(queryset, documents_url, resolution, fieldset)
+
+    yield '{"type":"FeatureCollection","features":['
+    separator = ""
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        while rows := cursor.fetchmany(GEOJSON_CHUNK_SIZE):
+            for (feature,) in rows:
+                yield separator + feature
+                separator = ","
+    yield "]}"
@@ -0,0 +1,69 @@
+import json
+import logging
+
+import requests
+from django.conf import settings
+from django.contrib.gis.gdal import GDALException
+from django.contrib.gis.geos import GEOSException, GEOSGeometry, MultiPolygon
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from datasets.blackspots.models import Stadsdeel
+from import_process.util import get_stadsdeel
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the stadsdeel boundaries used to determine the stadsdeel of a Spot "
+        "without calling the BAG geosearch api"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--geojson_path",
+            type=str,
+            default=None,
+            help="read the boundaries from a local GeoJSON file instead of the api",
+        )
+
+    def handle(self, *args, **options):
+        if geojson_path := options.get("geojson_path"):
+            with open(geojson_path) as file:
+                content = json.load(file)
+        else:
+            response = requests.get(settings.STADSDELEN_GEOJSON_URL, timeout=30)
+            response.raise_for_status()
+            content = response.json()
+
+        stadsdelen = []
+        for feature in content.get("features", []):
+            try:
+                stadsdelen.append(get_stadsdeel_boundary(feature))
+            except (KeyError, TypeError, ValueError, GDALException, GEOSException):
+                logger.warning(
+                    f"Skipping unexpected stadsdeel feature: {feature!r:.200}"
+                )
+
+        if not stadsdelen:
+            # keep the previous boundaries
+            logger.warning("No stadsdelen found, the boundaries are not replaced")
+            return
+
+        with transaction.atomic():
+            Stadsdeel.objects.all().delete()
+            Stadsdeel.objects.bulk_create(stadsdelen)
+        logger.info(f"Imported {len(stadsdelen)} stadsdelen")
+
+
+def get_stadsdeel_boundary(feature: dict) -> Stadsdeel:
+    properties = feature.get("properties", {})
+    geometry = GEOSGeometry(json.dumps(feature["geometry"]))
+    if geometry.geom_type == "Polygon":
+        geometry = MultiPolygon(geometry, srid=geometry.srid)
+    return Stadsdeel(
+        code=get_stadsdeel(properties["code"]),
+        naam=properties.get("naam", ""),
+        geometrie=geometry,
+    )
@@ -1,13 +1,52 @@
 import logging
+import threading
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
+from django.contrib.gis.geos import Point
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
 from api.bag_geosearch import BagGeoSearchAPI
+from api.dataset_version import increment_dataset_version
+from api.stadsdeel_resolver import get_stadsdeel_resolver
 from datasets.blackspots.models import Spot
 
 logger = logging.getLogger(__name__)
 
+BULK_BATCH_SIZE = 500
+
+
+class RateLimiter:
+    """
+    Spaces out calls over all threads to at most `rate` per second
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._lock = threading.Lock()
+        self._next_call = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_call - now
+            self._next_call = max(now, self._next_call) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def get_lookup_point(spot: Spot) -> Optional[Point]:
+    if spot.point:
+        return spot.point
+    if spot.polygoon:
+        return spot.polygoon.point_on_surface
+    if spot.wegvak:
+        return spot.wegvak.interpolate_normalized(0.5)
+    return None
+
 
 class Command(BaseCommand):
     help = (
@@ -15,21 +54,69 @@ class Command(BaseCommand):
         "is unknown due to earlier connection errors"
     )
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="number of concurrent stadsdeel lookups",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=10,
+            help="maximum number of BAG geosearch requests per second, 0 for no limit",
+        )
+
     def handle(self, *args, **options):
-        spots = Spot.objects.filter(stadsdeel=Spot.Stadsdelen.BagFout)
+        spots = list(
+            Spot.objects.filter(stadsdeel=Spot.Stadsdelen.BagFout).only(
+                "id", "stadsdeel", "point", "polygoon", "wegvak"
+            )
+        )
+        resolver = get_stadsdeel_resolver()
+        # load the boundaries once, before the worker threads need them
+        resolver.get_boundaries()
         bag_geosearch_api = BagGeoSearchAPI()
+        rate_limiter = RateLimiter(options["rate"])
+
+        def determine_stadsdeel(spot: Spot) -> Optional[str]:
+            point = get_lookup_point(spot)
+            if point is None:
+                logger.warning(f"Spot {spot.id} has no geometry, skipping")
+                return None
+
+            lat = point.y
+            lon = point.x
+            stadsdeel = resolver.get_stadsdeel(lat=lat, lon=lon)
+            if stadsdeel is None:
+                rate_limiter.wait()
+                stadsdeel = bag_geosearch_api.get_stadsdeel(lat=lat, lon=lon)
+            return stadsdeel
+
+        with ThreadPoolExecutor(max_workers=max(options["workers"], 1)) as executor:
+            stadsdelen = list(executor.map(determine_stadsdeel, spots))
+
         update_dict = defaultdict(int)
-        for spot in spots:
-            lat = spot.point.y
-            lon = spot.point.x
-            stadsdeel = bag_geosearch_api.get_stadsdeel(lat=lat, lon=lon)
+        updated_spots = []
+        for spot, stadsdeel in zip(spots, stadsdelen):
+            if stadsdeel is None:
+                continue
             if stadsdeel != spot.stadsdeel:
                 spot.stadsdeel = stadsdeel
-                spot.save()
+                updated_spots.append(spot)
 
             update_dict[stadsdeel] += 1
 
+        if updated_spots:
+            with transaction.atomic():
+                Spot.objects.bulk_update(
+                    updated_spots, ["stadsdeel"], batch_size=BULK_BATCH_SIZE
+                )
+                # bulk_update does not send the signals that track changes
+                increment_dataset_version()
+
         for stadsdeel in update_dict:
             logger.info(f"Updated {update_dict[stadsdeel]} Spots to {stadsdeel}")
-        else:
+        if not updated_spots:
             logger.info("No Spots updated; all have correct stadsdeel")
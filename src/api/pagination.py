@@ -0,0 +1,245 @@
+import base64
+import binascii
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+from datapunt_api.pagination import HALPagination
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from api.dataset_version import get_dataset_version
+from api.response_cache import get_response_cache
+
+
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, length: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise NotFound("Invalid cursor")
+    if not isinstance(values, list) or len(values) != length:
+        raise NotFound("Invalid cursor")
+    return values
+
+
+def coerce_cursor(values: list, fields) -> list:
+    """
+    :return: the decoded values as values of the ordering fields, so a cursor of the
+    wrong types is rejected instead of failing in the database
+    """
+    try:
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except (DjangoValidationError, TypeError):
+        raise NotFound("Invalid cursor")
+
+
+def get_estimated_count(queryset) -> Optional[int]:
+    """
+    :return: the number of rows of the table estimated by the query planner, for
+    unfiltered querysets of large tables only
+    """
+    threshold = settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD
+    if not threshold or queryset.query.where or queryset.query.distinct:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # -1 when the table was never analyzed, and inaccurate for small tables
+    if row is None or row[0] < threshold:
+        return None
+    return row[0]
+
+
+def count_queryset(queryset) -> int:
+    count = get_estimated_count(queryset)
+    return queryset.count() if count is None else count
+
+
+def get_cached_count(queryset) -> int:
+    """
+    Count the queryset once per filter signature, until the spots or documents change
+    """
+    timeout = settings.PAGINATION_COUNT_CACHE_TTL
+    if not timeout:
+        return count_queryset(queryset)
+
+    # the same signature for every ordering and selection of columns
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    key_hash = hashlib.sha256(f"{sql}|{params!r}".encode()).hexdigest()
+    # the version is stored in the database, so writes of every process invalidate it
+    key = f"spot-counts:{get_dataset_version()}:{key_hash}"
+
+    cache = get_response_cache()
+    count = cache.get(key)
+    if count is None:
+        count = count_queryset(queryset)
+        cache.set(key, count, timeout)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return get_cached_count(self.object_list)
+
+
+class CachedCountHALPagination(HALPagination):
+    """
+    HAL pagination that takes the total count from the cache, or from the estimate of
+    the query planner, instead of counting every request
+    """
+
+    django_paginator_class = CachedCountPaginator
+
+
+class HALKeysetPagination(BasePagination):
+    """
+    Keyset pagination in the HAL style of datapunt_api.pagination.HALPagination.
+    The cursor holds the ordering values of the last row of the page, and the next
+    page seeks past them with a row comparison instead of counting and skipping the
+    rows before it, so every page takes as long as the first one. There is no count
+    and no previous link.
+    """
+
+    page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+    max_page_size = settings.REST_FRAMEWORK["MAX_PAGINATE_BY"]
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+
+    def __init__(self, orderings: Dict[str, Sequence[str]]):
+        """
+        :param orderings: fields of the orderings a client can choose from by name,
+        the first one is the default. The fields must be unique together and not null.
+        """
+        self.orderings = orderings
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_ordering(self, request) -> List[str]:
+        name = request.query_params.get(self.ordering_query_param)
+        if name is None:
+            return list(next(iter(self.orderings.values())))
+        if name not in self.orderings:
+            raise ValidationError(
+                {
+                    self.ordering_query_param: [
+                        f"Expected one of {', '.join(self.orderings)}"
+                    ]
+                }
+            )
+        return list(self.orderings[name])
+
+    def get_fields(self, model, ordering: List[str]) -> list:
+        return [
+            model._meta.pk if name == "pk" else model._meta.get_field(name)
+            for name in ordering
+        ]
+
+    def get_columns(self, model, ordering: List[str]) -> List[str]:
+        table = connection.ops.quote_name(model._meta.db_table)
+        fields = self.get_fields(model, ordering)
+        return [
+            f"{table}.{connection.ops.quote_name(field.column)}" for field in fields
+        ]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = self.get_ordering(request)
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values = coerce_cursor(
+                decode_cursor(cursor, len(ordering)),
+                self.get_fields(queryset.model, ordering),
+            )
+            columns = self.get_columns(queryset.model, ordering)
+            placeholders = ", ".join(["%s"] * len(values))
+            queryset = queryset.filter(
+                RawSQL(
+                    f"({', '.join(columns)}) > ({placeholders})",
+                    values,
+                    output_field=BooleanField(),
+                )
+            )
+
+        rows = list(queryset[: page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = None
+        if len(rows) > page_size:
+            self.next_cursor = encode_cursor(
+                [getattr(page[-1], name) for name in ordering]
+            )
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    (
+                        "_links",
+                        OrderedDict(
+                            [
+                                ("self", dict(href=self.request.build_absolute_uri())),
+                                ("next", dict(href=self.get_next_link())),
+                                ("previous", dict(href=None)),
+                            ]
+                        ),
+                    ),
+                    ("results", data),
+                ]
+            )
+        )
+
+
+class CursorPaginationMixin:
+    """
+    Opt-in keyset pagination with ?pagination=cursor, the links to the next pages
+    keep the parameter. The default HAL pagination is used otherwise.
+    """
+
+    cursor_orderings = {"pk": ["pk"]}
+
+    @property
+    def paginator(self):
+        # there is no request when the schema is generated
+        request = getattr(self, "request", None)
+        if (
+            not hasattr(self, "_paginator")
+            and request is not None
+            and request.query_params.get("pagination") == "cursor"
+        ):
+            self._paginator = HALKeysetPagination(self.cursor_orderings)
+        return super().paginator
@@ -1,6 +1,6 @@
 import csv
 
-from rest_framework.renderers import JSONRenderer
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework_csv.misc import Echo
 
 
@@ -14,6 +14,17 @@ class StreamingCSVRenderer:
         for obj in data:
             yield writer.writerow(obj)
 
+    def render_rows(self, rows, fieldnames):
+        """
+        Render rows of values in the order of the fieldnames, without building a
+        dict per row
+        """
+        writer = csv.writer(Echo(), dialect="excel", delimiter=";")
+        yield writer.writerow(fieldnames)
+
+        for row in rows:
+            yield writer.writerow(row)
+
 
 class GeojsonRenderer(JSONRenderer):
     """
@@ -21,3 +32,18 @@ class GeojsonRenderer(JSONRenderer):
     """
 
     format = "geojson"
+
+
+class MVTRenderer(BaseRenderer):
+    """
+    Passes Mapbox Vector Tiles built by the database through
+    """
+
+    media_type = "application/vnd.mapbox-vector-tile"
+    format = "pbf"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # error responses have no tile to render
+        return data if isinstance(data, bytes) else b""
@@ -0,0 +1,92 @@
+import hashlib
+import logging
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import FileResponse, HttpResponse
+
+from api.dataset_version import get_request_dataset_version
+
+logger = logging.getLogger(__name__)
+
+# the browsable api embeds forms and a csrf token of the request
+CACHED_FORMATS = ["json", "geojson"]
+
+
+def get_response_cache():
+    return caches[settings.SPOT_RESPONSE_CACHE]
+
+
+def get_response_cache_key(request, version: int) -> str:
+    """
+    :param version: dataset version, stored in the database, so a write by any
+    process or by the importer invalidates the responses cached by every process
+    :return: key of the url with the scheme and host, which the links in the cached
+    responses are built from
+    """
+    scopes = getattr(request, "get_token_scopes", None) or []
+    key = "|".join(
+        [
+            request.build_absolute_uri(request.path),
+            urlencode(sorted(request.query_params.lists()), doseq=True),
+            request.accepted_renderer.format,
+            ",".join(sorted(scopes)),
+        ]
+    )
+    key_hash = hashlib.sha256(key.encode()).hexdigest()
+    return f"spot-responses:{version}:{key_hash}"
+
+
+class CachedResponseMixin:
+    """
+    Caches the json and geojson responses of the list and retrieve actions until the
+    dataset version changes, see api.dataset_version
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        timeout = settings.SPOT_RESPONSE_CACHE_TTL
+        if not timeout or request.accepted_renderer.format not in CACHED_FORMATS:
+            return handler(request, *args, **kwargs)
+
+        cache = get_response_cache()
+        key = get_response_cache_key(request, get_request_dataset_version(request))
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = handler(request, *args, **kwargs)
+        # file responses are sent from disk already, and may be precompressed
+        if response.status_code != 200 or isinstance(response, FileResponse):
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.cache_streaming_content(
+                key, response["Content-Type"], response.streaming_content
+            )
+        else:
+            response.add_post_render_callback(
+                lambda rendered: cache.set(
+                    key, (rendered.content, rendered["Content-Type"]), timeout
+                )
+            )
+        return response
+
+    def cache_streaming_content(self, key, content_type, chunks):
+        """
+        Pass the chunks through, and cache them once the response is complete
+        """
+        content = []
+        for chunk in chunks:
+            content.append(chunk)
+            yield chunk
+        get_response_cache().set(
+            key, (b"".join(content), content_type), settings.SPOT_RESPONSE_CACHE_TTL
+        )
@@ -1,3 +1,4 @@
+import copy
 import logging
 
 import six
@@ -9,13 +10,16 @@ from django.db.models import query
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
+from rest_framework_gis.fields import GeoJsonDict
 from rest_framework_gis.serializers import (
     GeoFeatureModelSerializer,
     GeometrySerializerMethodField,
 )
 
 from api.bag_geosearch import BagGeoSearchAPI
-from datasets.blackspots.models import Document, Spot
+from api.generalization import get_precision, round_coordinates
+from api.stadsdeel_resolver import get_stadsdeel_resolver
+from datasets.blackspots.models import EDITED_IMPORT_HASH, Document, Spot
 from storage.object_store import ObjectStore
 
 logger = logging.getLogger(__name__)
@@ -41,7 +45,58 @@ class SpotDocumentSerializer(HALSerializer):
         exclude = ["spot"]
 
 
-class SpotGeojsonSerializer(GeoFeatureModelSerializer):
+class GeneralizedGeometryMixin:
+    """
+    Serializes the generalized wegvak and polygoon of the resolution in the context,
+    prefetched by the view as "generalized", with the precision of the resolution
+    """
+
+    def to_representation(self, instance):
+        resolution = self.context.get("resolution")
+        if not resolution:
+            return super().to_representation(instance)
+
+        generalized = getattr(instance, "generalized", None)
+        if generalized:
+            # a copy, so the instance keeps its full geometries
+            instance = copy.copy(instance)
+            instance.wegvak = generalized[0].wegvak
+            instance.polygoon = generalized[0].polygoon
+
+        data = super().to_representation(instance)
+        precision = get_precision(resolution)
+        for values in [data, data.get("properties") or {}]:
+            for value in values.values():
+                if isinstance(value, GeoJsonDict):
+                    value["coordinates"] = round_coordinates(
+                        value["coordinates"], precision
+                    )
+        return data
+
+
+class SparseFieldsetMixin:
+    """
+    Only serializes the fields of the sparse fieldset in the context, see
+    api.fieldsets. The id and the geometry of a feature are always serialized.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get("fieldset")
+        if fieldset is None:
+            return fields
+
+        required = {"id", getattr(self.Meta, "geo_field", None)}
+        return {
+            name: field
+            for name, field in fields.items()
+            if name in fieldset or name in required
+        }
+
+
+class SpotGeojsonSerializer(
+    SparseFieldsetMixin, GeneralizedGeometryMixin, GeoFeatureModelSerializer
+):
     id = serializers.ReadOnlyField()
     stadsdeel = serializers.CharField(source="get_stadsdeel_display", read_only=True)
     documents = SpotDocumentSerializer(many=True, read_only=True)
@@ -58,7 +113,7 @@ class SpotGeojsonSerializer(GeoFeatureModelSerializer):
 
     class Meta(object):
         model = Spot
-        fields = "__all__"
+        exclude = ["import_hash"]
         geo_field = "point_or_polygoon"
 
         # Detail url is constructed using location_id instead of pk,
@@ -78,7 +133,7 @@ class DisplayChoiceField(serializers.ChoiceField):
         return self.choices.get(six.text_type(value), value)
 
 
-class SpotSerializer(HALSerializer):
+class SpotSerializer(SparseFieldsetMixin, GeneralizedGeometryMixin, HALSerializer):
     id = serializers.ReadOnlyField()
     stadsdeel = DisplayChoiceField(choices=Spot.Stadsdelen.choices, required=False)
     documents = SpotDocumentSerializer(many=True, read_only=True)
@@ -213,7 +268,11 @@ class SpotSerializer(HALSerializer):
     def determine_stadsdeel(self, point):
         lat = point.y
         lon = point.x
-        return BagGeoSearchAPI().get_stadsdeel(lat=lat, lon=lon)
+        stadsdeel = get_stadsdeel_resolver().get_stadsdeel(lat=lat, lon=lon)
+        if stadsdeel is None:
+            # no local boundaries available, fall back to the remote api
+            stadsdeel = BagGeoSearchAPI().get_stadsdeel(lat=lat, lon=lon)
+        return stadsdeel
 
     def create(self, validated_data):
         rapport_file = validated_data.pop("rapport_document", None)
@@ -245,6 +304,10 @@ class SpotSerializer(HALSerializer):
         rapport_file = validated_data.pop("rapport_document", None)
         design_file = validated_data.pop("design_document", None)
 
+        # make sure the next incremental import rewrites the edited spot
+        if instance.import_hash is not None:
+            validated_data["import_hash"] = EDITED_IMPORT_HASH
+
         spot = super().update(instance, validated_data)
         self.handle_documents(spot, rapport_file, design_file)
         return spot
@@ -283,7 +346,7 @@ class SpotSerializer(HALSerializer):
 
     class Meta(object):
         model = Spot
-        fields = "__all__"
+        exclude = ["import_hash"]
 
         # Detail url is constructed using location_id instead of pk,
         # see: https://www.django-rest-framework.org/api-guide/serializers/#how-hyperlinked-views-are-determined # noqa: 501
@@ -0,0 +1,43 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.dataset_version import increment_dataset_version
+from api.generalization import refresh_generalized_geometries
+from datasets.blackspots.models import Document, Spot
+
+_deferred = threading.local()
+
+
+@contextmanager
+def defer_change_tracking():
+    """
+    Skip the dataset version increment and the generalization of every saved or
+    deleted spot and document, for changes of many rows that do both once afterwards
+    """
+    _deferred.active = True
+    try:
+        yield
+    finally:
+        _deferred.active = False
+
+
+def is_change_tracking_deferred() -> bool:
+    return getattr(_deferred, "active", False)
+
+
+@receiver(post_save, sender=Spot)
+@receiver(post_delete, sender=Spot)
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def spot_data_changed(sender, **kwargs):
+    if not is_change_tracking_deferred():
+        increment_dataset_version()
+
+
+@receiver(post_save, sender=Spot)
+def spot_saved(sender, instance, raw=False, **kwargs):
+    if not raw and not is_change_tracking_deferred():
+        refresh_generalized_geometries([instance.pk])
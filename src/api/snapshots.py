@@ -0,0 +1,138 @@
+import fcntl
+import gzip
+import logging
+import os
+import re
+import shutil
+from typing import Callable, Iterable, Optional
+
+import brotli
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
+
+from datasets.blackspots.models import Spot
+
+logger = logging.getLogger(__name__)
+
+# the default of 11 takes seconds for the full geojson, 5 compresses nearly as well
+BROTLI_QUALITY = 5
+
+# content encoding, file suffix and compression of the precompressed variants, in
+# order of preference
+SNAPSHOT_ENCODINGS = [
+    ("br", ".br", lambda content: brotli.compress(content, quality=BROTLI_QUALITY)),
+    ("gzip", ".gz", lambda content: gzip.compress(content, mtime=0)),
+]
+
+
+class SnapshotStore:
+    """
+    Responses materialized on local disk once per dataset version, next to their
+    precompressed variants. Snapshots of older versions are removed when a newer
+    version is built.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def get_path(self, version: int, name: str) -> str:
+        return os.path.join(self.directory, str(version), name)
+
+    def get(self, version: int, name: str, build: Callable[[], Iterable[bytes]]) -> str:
+        """
+        :param build: returns the content of the snapshot, only called when it does
+        not exist yet
+        :return: path of the uncompressed snapshot
+        """
+        path = self.get_path(version, name)
+        if os.path.isfile(path):
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # built once, concurrent requests of all processes wait for the first build
+        with open(f"{path}.lock", "wb") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if os.path.isfile(path):
+                return path
+
+            logger.info(f"Building snapshot {path}")
+            content = b"".join(build())
+            # the uncompressed file is written last, it marks the snapshot as complete
+            for _encoding, suffix, compress in SNAPSHOT_ENCODINGS:
+                self.write(f"{path}{suffix}", compress(content))
+            self.write(path, content)
+
+        self.remove_other_versions(version)
+        return path
+
+    def write(self, path: str, content: bytes):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(content)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def remove_other_versions(self, version: int):
+        for entry in os.scandir(self.directory):
+            if entry.is_dir() and entry.name.isdigit() and int(entry.name) < version:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def get_snapshot_store() -> SnapshotStore:
+    return SnapshotStore(settings.SPOT_SNAPSHOT_DIR)
+
+
+def get_snapshot_key(request, ignored_params=()) -> Optional[str]:
+    """
+    :return: "all" or the stadsdeel code when the request selects all spots or
+    those of one stadsdeel, None for the other requests
+    """
+    params = {
+        name: values
+        for name, values in request.query_params.lists()
+        if name not in ignored_params
+    }
+    if not params:
+        return "all"
+    if list(params) == ["stadsdeel"] and len(params["stadsdeel"]) == 1:
+        stadsdeel = params["stadsdeel"][0]
+        if stadsdeel in Spot.Stadsdelen.values:
+            return stadsdeel
+    return None
+
+
+def get_accepted_encoding(request) -> Optional[str]:
+    qualities = {}
+    for coding in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        name, _, params = coding.partition(";")
+        quality = 1.0
+        if match := re.search(r"q=([\d.]+)", params):
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    for encoding, _suffix, _compress in SNAPSHOT_ENCODINGS:
+        if qualities.get(encoding, qualities.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def snapshot_response(request, path: str, content_type: str) -> FileResponse:
+    """
+    Send the snapshot in the preferred encoding the client accepts
+    """
+    encoding = get_accepted_encoding(request)
+    suffix = {encoding: suffix for encoding, suffix, _ in SNAPSHOT_ENCODINGS}.get(
+        encoding, ""
+    )
+    response = FileResponse(open(f"{path}{suffix}", "rb"), content_type=content_type)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
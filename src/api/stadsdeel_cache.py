@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from datasets.blackspots.models import Spot
+
+logger = logging.getLogger(__name__)
+
+
+class StadsdeelCache:
+    """
+    LRU cache of stadsdeel lookups, keyed by the coordinate snapped to a grid of
+    grid_size degrees. Entries expire after ttl seconds. When backend is the alias
+    of a Django cache, lookups missing from process memory are shared through it.
+
+    Lookups that failed with BagFout are never cached.
+    """
+
+    def __init__(
+        self,
+        grid_size: float,
+        max_size: int,
+        ttl: int,
+        backend: Optional[str] = None,
+    ):
+        self.grid_size = grid_size
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get_key(self, lat, lon) -> Tuple[int, int]:
+        return round(lat / self.grid_size), round(lon / self.grid_size)
+
+    def get_backend_key(self, key: Tuple[int, int]) -> str:
+        return f"stadsdeel:{self.grid_size}:{key[0]}:{key[1]}"
+
+    def get(self, lat, lon) -> Optional[str]:
+        if not self.enabled:
+            return None
+
+        key = self.get_key(lat, lon)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stadsdeel, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return stadsdeel
+                del self._entries[key]
+
+        stadsdeel = None
+        if self.backend:
+            stadsdeel = caches[self.backend].get(self.get_backend_key(key))
+
+        with self._lock:
+            if stadsdeel is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, stadsdeel)
+        return stadsdeel
+
+    def set(self, lat, lon, stadsdeel: str):
+        if not self.enabled or stadsdeel == Spot.Stadsdelen.BagFout:
+            return
+
+        key = self.get_key(lat, lon)
+        with self._lock:
+            self._store(key, stadsdeel)
+        if self.backend:
+            caches[self.backend].set(
+                self.get_backend_key(key), stadsdeel, timeout=self.ttl
+            )
+
+    def _store(self, key: Tuple[int, int], stadsdeel: str):
+        self._entries[key] = (stadsdeel, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_stadsdeel_cache() -> StadsdeelCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = StadsdeelCache(
+                grid_size=settings.STADSDEEL_CACHE_GRID_SIZE,
+                max_size=settings.STADSDEEL_CACHE_MAX_SIZE,
+                ttl=settings.STADSDEEL_CACHE_TTL,
+                backend=settings.STADSDEEL_CACHE_BACKEND,
+            )
+        return _cache
@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+
+from datasets.blackspots.models import Spot, Stadsdeel
+
+logger = logging.getLogger(__name__)
+
+# (xmin, ymin, xmax, ymax), prepared geometry, stadsdeel code
+Boundary = Tuple[Tuple[float, float, float, float], object, str]
+
+
+class StadsdeelResolver:
+    """
+    Determines the stadsdeel of a coordinate in-process, using the boundaries in the
+    Stadsdeel table. The boundaries are loaded once as prepared geometries and
+    reloaded after STADSDEEL_BOUNDARIES_TTL seconds.
+    """
+
+    def __init__(self, boundaries: Optional[List[Boundary]] = None):
+        self._boundaries = boundaries
+        self._loaded_at = time.monotonic() if boundaries is not None else None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load_boundaries() -> List[Boundary]:
+        return [
+            (stadsdeel.geometrie.extent, stadsdeel.geometrie.prepared, stadsdeel.code)
+            for stadsdeel in Stadsdeel.objects.all()
+        ]
+
+    def get_boundaries(self) -> List[Boundary]:
+        with self._lock:
+            expired = (
+                self._loaded_at is None
+                or time.monotonic() - self._loaded_at
+                > settings.STADSDEEL_BOUNDARIES_TTL
+            )
+            if expired:
+                try:
+                    self._boundaries = self.load_boundaries()
+                except Exception:
+                    # keep the previous boundaries and try again on the next lookup
+                    logger.exception("Failed to load stadsdeel boundaries")
+                    return self._boundaries or []
+                self._loaded_at = time.monotonic()
+            return self._boundaries
+
+    def get_stadsdeel(self, lat, lon) -> Optional[str]:
+        """
+        :return: the stadsdeel code, Geen when the coordinate is outside all
+        stadsdelen or None when no boundaries are available
+        """
+        boundaries = self.get_boundaries()
+        if not boundaries:
+            return None
+
+        point = Point(x=lon, y=lat, srid=4326)
+        for (xmin, ymin, xmax, ymax), prepared, code in boundaries:
+            if xmin <= lon <= xmax and ymin <= lat <= ymax and prepared.covers(point):
+                return code
+        return Spot.Stadsdelen.Geen
+
+
+_resolver = StadsdeelResolver()
+
+
+def get_stadsdeel_resolver() -> StadsdeelResolver:
+    return _resolver
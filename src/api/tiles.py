@@ -0,0 +1,88 @@
+from typing import Tuple
+
+from django.db import connection
+
+from datasets.blackspots.models import Spot
+
+# half the width of the web mercator (EPSG:3857) world
+WEB_MERCATOR_EXTENT = 20037508.342789244
+MAX_ZOOM = 22
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+TILE_LAYER = "spots"
+
+
+def is_valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2**z and 0 <= y < 2**z
+
+
+def get_tile_envelope(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    :return: xmin, ymin, xmax, ymax of the xyz tile in web mercator
+    """
+    size = 2 * WEB_MERCATOR_EXTENT / 2**z
+    xmin = -WEB_MERCATOR_EXTENT + x * size
+    ymax = WEB_MERCATOR_EXTENT - y * size
+    return xmin, ymax - size, xmin + size, ymax
+
+
+def get_spot_tile(z: int, x: int, y: int) -> bytes:
+    """
+    Build a Mapbox Vector Tile of the spots in PostGIS. Every spot is drawn with its
+    polygoon, point or wegvak, in the order the geojson output uses.
+    """
+    xmin, ymin, xmax, ymax = get_tile_envelope(z, x, y)
+    # include the geometries in the buffer around the tile
+    margin = (xmax - xmin) * TILE_BUFFER / TILE_EXTENT
+    table = Spot._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH bounds AS (
+                SELECT
+                    ST_MakeEnvelope(%s, %s, %s, %s, 3857) AS geom,
+                    ST_Transform(
+                        ST_Expand(ST_MakeEnvelope(%s, %s, %s, %s, 3857), %s), 4326
+                    ) AS search_geom
+            )
+            SELECT ST_AsMVT(tile, %s, %s, 'geom') FROM (
+                SELECT
+                    ST_AsMVTGeom(
+                        ST_Transform(
+                            COALESCE(spot.polygoon, spot.point, spot.wegvak), 3857
+                        ),
+                        bounds.geom,
+                        %s,
+                        %s,
+                        true
+                    ) AS geom,
+                    spot.id,
+                    spot.locatie_id,
+                    spot.spot_type,
+                    spot.status,
+                    spot.stadsdeel
+                FROM {table} AS spot, bounds
+                WHERE spot.point && bounds.search_geom
+                    OR spot.polygoon && bounds.search_geom
+                    OR spot.wegvak && bounds.search_geom
+            ) AS tile
+            WHERE tile.geom IS NOT NULL
+            """,
+            [
+                xmin,
+                ymin,
+                xmax,
+                ymax,
+                xmin,
+                ymin,
+                xmax,
+                ymax,
+                margin,
+                TILE_LAYER,
+                TILE_EXTENT,
+                TILE_EXTENT,
+                TILE_BUFFER,
+            ],
+        )
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] is not None else b""
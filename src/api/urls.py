@@ -37,6 +37,11 @@ schema_view = get_schema_view(
 )
 
 urlpatterns = [
+    re_path(
+        r"^spots/tiles/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.pbf$",
+        views.SpotTileView.as_view(),
+        name="spot-tiles",
+    ),
     path("", include(router.urls)),
     re_path(
         r"^swagger(?P<format>\.json|\.yaml)$",
@@ -1,36 +1,118 @@
+import hashlib
 import logging
 from datetime import date
+from http import HTTPStatus
+from typing import Optional, Tuple
 
 from datapunt_api.rest import DatapuntViewSet
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
 from django.http import (
+    FileResponse,
     Http404,
     HttpResponse,
     HttpResponseServerError,
     StreamingHttpResponse,
 )
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import parse_http_date_safe, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins
 from rest_framework.decorators import action
 from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from swiftclient.exceptions import ClientException
 
 from api import serializers
-from api.renderers import GeojsonRenderer, StreamingCSVRenderer
+from api.dataset_version import (
+    DatasetVersionETagMixin,
+    get_dataset_version,
+    get_request_dataset_version,
+)
+from api.export import render_spot_export
+from api.fieldsets import get_fieldset, get_only_fields
+from api.filters import SpotFilter
+from api.generalization import get_resolution
+from api.geojson import stream_spot_geojson
+from api.pagination import CachedCountHALPagination, CursorPaginationMixin
+from api.renderers import GeojsonRenderer, MVTRenderer
+from api.response_cache import CachedResponseMixin
 from api.serializers import SpotCSVSerializer, SpotGeojsonSerializer
+from api.snapshots import get_snapshot_key, get_snapshot_store, snapshot_response
+from api.tiles import get_spot_tile, is_valid_tile
 from datasets.blackspots import models
+from storage.document_cache import get_document_cache
 from storage.object_store import ObjectStore
 
 logger = logging.getLogger(__name__)
 
+# object store response headers that are passed on to the client by the document proxy
+PASSTHROUGH_DOCUMENT_HEADERS = [
+    "accept-ranges",
+    "content-length",
+    "content-range",
+    "etag",
+    "last-modified",
+]
+# client request headers that are passed on to the object store by the document proxy
+FORWARDED_DOCUMENT_REQUEST_HEADERS = ["Range", "If-None-Match", "If-Modified-Since"]
+# ordering of the csv export, also available to the cursor pagination of the spots
+SPOT_EXPORT_ORDERING = ["stadsdeel", "spot_type", "pk"]
+
+
+class GeojsonListMixin:
+    """
+    Lets the database build the unpaginated geojson list. Placed below the ETag and
+    response cache mixins, so they also apply to the geojson list.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format == "geojson":
+            queryset = self.filter_queryset(self.get_queryset())
+            documents_url = reverse("document-list", request=request)
+            chunks = stream_spot_geojson(
+                queryset,
+                documents_url,
+                get_resolution(request.query_params),
+                self.get_fieldset(),
+            )
+
+            snapshot_key = get_snapshot_key(request, ignored_params=["format"])
+            if snapshot_key:
+                # the links to the documents depend on the host of the request
+                url_hash = hashlib.sha256(documents_url.encode()).hexdigest()[:16]
+                path = get_snapshot_store().get(
+                    get_request_dataset_version(request),
+                    f"spots-{snapshot_key}-{url_hash}.geojson",
+                    lambda: (chunk.encode() for chunk in chunks),
+                )
+                return snapshot_response(request, path, "application/json")
+
+            return StreamingHttpResponse(chunks, content_type="application/json")
+        return super().list(request, *args, **kwargs)
 
-class SpotViewSet(DatapuntViewSet, ModelViewSet):
-    queryset = models.Spot.objects.all().order_by("pk")
+
+class SpotViewSet(
+    DatasetVersionETagMixin,
+    CachedResponseMixin,
+    GeojsonListMixin,
+    CursorPaginationMixin,
+    DatapuntViewSet,
+    ModelViewSet,
+):
+    queryset = models.Spot.objects.prefetch_related("documents").order_by("pk")
+    pagination_class = CachedCountHALPagination
+    cursor_orderings = {"pk": ["pk"], "export": SPOT_EXPORT_ORDERING}
     serializer_class = serializers.SpotSerializer
     serializer_detail_class = serializers.SpotSerializer
     lookup_field = "id"
+    filterset_class = SpotFilter
     renderer_classes = (JSONRenderer, BrowsableAPIRenderer, GeojsonRenderer)
     parser_classes = [FormParser, MultiPartParser]
 
@@ -43,6 +125,46 @@ class SpotViewSet(DatapuntViewSet, ModelViewSet):
         else:
             return DatapuntViewSet.get_serializer_class(self, *args, **kwargs)
 
+    def get_fieldset(self):
+        if self.request.method not in SAFE_METHODS:
+            return None
+        return get_fieldset(
+            self.request.query_params, self.get_serializer_class()().fields
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            # the geometry of a geojson feature is made of the point or polygoon
+            required = (
+                ["point", "polygoon"]
+                if self.request.accepted_renderer.format == "geojson"
+                else []
+            )
+            queryset = queryset.only(*get_only_fields(models.Spot, fieldset, required))
+            if "documents" not in fieldset:
+                queryset = queryset.prefetch_related(None)
+
+        resolution = get_resolution(self.request.query_params)
+        if resolution:
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "generalized_geometries",
+                    queryset=models.GeneralizedGeometry.objects.filter(
+                        resolution=resolution
+                    ),
+                    to_attr="generalized",
+                )
+            )
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["resolution"] = get_resolution(self.request.query_params)
+        context["fieldset"] = self.get_fieldset()
+        return context
+
     def paginate_queryset(self, *args, **kwargs):
         """
         Overwrites super method to not use pagination on "format" query param
@@ -53,22 +175,31 @@ class SpotViewSet(DatapuntViewSet, ModelViewSet):
             return DatapuntViewSet.paginate_queryset(self, *args, **kwargs)
 
 
-class CSVDownloadViewSet:
-    def stream_csv_download(self, stream_response, serializer, filename_prefix):
-        renderer = StreamingCSVRenderer()
+class SpotTileView(APIView):
+    """
+    Mapbox Vector Tiles of the spots, with the spot_type, status and stadsdeel codes
+    """
 
-        # the actual serializer might be wrapped by using list_serializer_class
-        actual_serializer = (
-            getattr(serializer, "child") if hasattr(serializer, "child") else serializer
-        )
-        fieldnames = actual_serializer.get_fields().keys()
+    renderer_classes = [MVTRenderer]
 
-        response_class = StreamingHttpResponse if stream_response else HttpResponse
-        response = response_class(
-            renderer.render(data=serializer.data, fieldnames=fieldnames),
-            content_type="text/csv",
-        )
+    def get(self, request, z, x, y):
+        z, x, y = int(z), int(x), int(y)
+        if not is_valid_tile(z, x, y):
+            raise Http404("Tile does not exist")
+
+        cache_key = f"spot-tile:{get_dataset_version()}:{z}:{x}:{y}"
+        tile = cache.get(cache_key)
+        if tile is None:
+            tile = get_spot_tile(z, x, y)
+            cache.set(cache_key, tile, timeout=settings.SPOT_TILE_CACHE_TTL)
 
+        response = Response(tile)
+        patch_cache_control(response, max_age=settings.SPOT_TILE_CACHE_TTL)
+        return response
+
+
+class CSVDownloadViewSet:
+    def set_csv_filename(self, response, filename_prefix):
         today = date.today()
         filename = f"{filename_prefix}_{today}.csv"
         response["Content-Disposition"] = (
@@ -78,19 +209,45 @@ class CSVDownloadViewSet:
         return response
 
 
-class SpotExportViewSet(mixins.ListModelMixin, GenericViewSet, CSVDownloadViewSet):
-    queryset = models.Spot.objects.all().order_by("stadsdeel", "spot_type", "pk")
+class SpotExportViewSet(
+    DatasetVersionETagMixin, mixins.ListModelMixin, GenericViewSet, CSVDownloadViewSet
+):
+    queryset = models.Spot.objects.all().order_by(*SPOT_EXPORT_ORDERING)
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["stadsdeel", "spot_type", "status"]
     serializer_class = SpotCSVSerializer
     pagination_class = None
 
     def list(self, request, *args, **kwargs):
+        return self.conditional_response(self.export, request, *args, **kwargs)
+
+    def export(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return self.stream_csv_download(
-            stream_response=True, serializer=serializer, filename_prefix="wba_export"
-        )
+        # rendered from the values of the columns, like SpotCSVSerializer would
+        lines = render_spot_export(queryset)
+
+        snapshot_key = get_snapshot_key(request, ignored_params=["format"])
+        if snapshot_key:
+            path = get_snapshot_store().get(
+                get_request_dataset_version(request),
+                f"wba_export-{snapshot_key}.csv",
+                lambda: (line.encode() for line in lines),
+            )
+            return self.set_csv_filename(
+                snapshot_response(request, path, "text/csv"), "wba_export"
+            )
+
+        response = StreamingHttpResponse(lines, content_type="text/csv")
+        return self.set_csv_filename(response, "wba_export")
+
+
+def copy_document_headers(response: HttpResponse, headers) -> HttpResponse:
+    for header in PASSTHROUGH_DOCUMENT_HEADERS:
+        if header in headers:
+            response[header] = headers[header]
+    if response.has_header("etag"):
+        response["ETag"] = quote_etag(response["ETag"])
+    return response
 
 
 def handle_swift_exception(
@@ -105,6 +262,15 @@ def handle_swift_exception(
     """
     path = f"{container_name}/{filename}"
 
+    # responses to the forwarded conditional and range request headers
+    if e.http_status in (
+        HTTPStatus.NOT_MODIFIED,
+        HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+    ):
+        return copy_document_headers(
+            HttpResponse(status=e.http_status), e.http_response_headers or {}
+        )
+
     if "Unauthorized" in e.msg or "Authorization Failure" in e.msg:
         logger.error(f"Error with object store connection, error: {e}")
         return HttpResponseServerError()
@@ -119,8 +285,100 @@ def handle_swift_exception(
     return HttpResponseServerError()
 
 
-class DocumentViewSet(DatapuntViewSet):
-    queryset = models.Document.objects.all().order_by("pk")
+class ConnectionRelease:
+    """
+    Hands the object store connection back to the pool once, however many of the
+    places that may be done with it call it
+    """
+
+    def __init__(self, objstore: ObjectStore, connection):
+        self.objstore = objstore
+        self.connection = connection
+        self.released = False
+
+    def __call__(self):
+        if not self.released:
+            self.released = True
+            self.objstore.release_connection(self.connection)
+
+
+class DocumentStreamingResponse(StreamingHttpResponse):
+    """
+    Releases the object store connection when Django closes the response, also
+    when the body was never read, e.g. for a HEAD request or a disconnected client
+    """
+
+    def __init__(self, *args, release: ConnectionRelease, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.release = release
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.release()
+
+
+def stream_and_release(chunks, release: ConnectionRelease):
+    """
+    Hand the connection back to the pool as soon as the whole body has been sent
+    """
+    try:
+        yield from chunks
+    finally:
+        release()
+
+
+def revalidate_cached_document(
+    document_cache, container_path: str, filename: str, cached: Tuple[str, dict]
+) -> Optional[Tuple[str, dict]]:
+    """
+    Compare the ETag of the cached document to the object store, where the document
+    may have been replaced directly
+    :return: the cached document when it is unchanged
+    """
+    path, headers = cached
+    objstore = ObjectStore(settings.OBJECTSTORE_CONNECTION_CONFIG)
+    with objstore.pooled_connection() as connection:
+        etag = objstore.get_etag(connection, container_path, filename)
+
+    if etag != headers["etag"].strip('"'):
+        document_cache.invalidate(container_path, filename)
+        return None
+    document_cache.mark_validated(path)
+    return cached
+
+
+def cached_document_response(
+    request, filename: str, path: str, headers: dict
+) -> Optional[HttpResponse]:
+    etag = quote_etag(headers["etag"])
+    last_modified = headers.get("last-modified")
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=parse_http_date_safe(last_modified) if last_modified else None,
+    )
+    if response is not None:
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = last_modified
+        return response
+
+    try:
+        file = open(path, "rb")
+    except FileNotFoundError:
+        # evicted in the meantime
+        return None
+
+    response = FileResponse(file, content_type=headers.get("content-type"))
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return copy_document_headers(response, headers)
+
+
+class DocumentViewSet(CursorPaginationMixin, DatapuntViewSet):
+    queryset = models.Document.objects.select_related("spot").order_by("pk")
+    pagination_class = CachedCountHALPagination
     serializer_class = serializers.DocumentSerializer
     serializer_detail_class = serializers.DocumentSerializer
 
@@ -130,18 +388,50 @@ class DocumentViewSet(DatapuntViewSet):
         container_path = ObjectStore.get_container_path(document_model.type)
         filename = document_model.filename
 
+        # let the object store handle range and conditional requests
+        request_headers = {
+            header: request.headers[header]
+            for header in FORWARDED_DOCUMENT_REQUEST_HEADERS
+            if header in request.headers
+        }
+
+        # range requests are left to the object store
+        document_cache = get_document_cache()
+        if "Range" not in request_headers:
+            cached = document_cache.get(container_path, filename)
+            if cached and document_cache.is_stale(cached[0]):
+                cached = revalidate_cached_document(
+                    document_cache, container_path, filename, cached
+                )
+            if cached:
+                response = cached_document_response(request, filename, *cached)
+                if response is not None:
+                    return response
+
         objstore = ObjectStore(settings.OBJECTSTORE_CONNECTION_CONFIG)
-        connection = objstore.get_connection()
+        release = ConnectionRelease(objstore, objstore.acquire_connection())
         try:
-            store_object = objstore.get_document(connection, container_path, filename)
+            headers, chunks = objstore.get_document(
+                release.connection, container_path, filename, headers=request_headers
+            )
+            chunks = stream_and_release(chunks, release)
+            if "content-range" not in headers:
+                chunks = document_cache.store(container_path, filename, headers, chunks)
+
+            response = DocumentStreamingResponse(
+                chunks,
+                release=release,
+                content_type=headers.get("content-type"),
+                status=HTTPStatus.PARTIAL_CONTENT
+                if "content-range" in headers
+                else HTTPStatus.OK,
+            )
         except ClientException as e:
+            release()
             return handle_swift_exception(container_path, filename, e)
+        except Exception:
+            release()
+            raise
 
-        content_type = store_object[0].get("content-type")
-        obj_data = store_object[1]
-
-        response = HttpResponse(content_type=content_type)
         response["Content-Disposition"] = f'attachment; filename="{filename}"'
-        response.write(obj_data)
-
-        return response
+        return copy_document_headers(response, headers)
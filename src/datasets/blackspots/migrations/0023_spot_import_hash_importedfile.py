@@ -0,0 +1,34 @@
+# Generated by Django 4.1.13 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("blackspots", "0022_spot_linestring_to_polygon"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="spot",
+            name="import_hash",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.CreateModel(
+            name="ImportedFile",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=256, unique=True)),
+                ("content_hash", models.CharField(max_length=64)),
+                ("imported_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
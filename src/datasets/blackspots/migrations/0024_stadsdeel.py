@@ -0,0 +1,52 @@
+# Generated by Django 4.1.13 on 2026-10-18 11:02
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("blackspots", "0023_spot_import_hash_importedfile"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Stadsdeel",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "code",
+                    models.CharField(
+                        choices=[
+                            ("T", "Zuidoost"),
+                            ("A", "Centrum"),
+                            ("N", "Noord"),
+                            ("B", "Westpoort"),
+                            ("E", "West"),
+                            ("F", "Nieuw West"),
+                            ("K", "Zuid"),
+                            ("M", "Oost"),
+                            ("S", "Weesp"),
+                            ("X", "Geen"),
+                            ("ERR", "BagFout"),
+                        ],
+                        max_length=3,
+                        unique=True,
+                    ),
+                ),
+                ("naam", models.CharField(max_length=64)),
+                (
+                    "geometrie",
+                    django.contrib.gis.db.models.fields.MultiPolygonField(srid=4326),
+                ),
+            ],
+        ),
+    ]
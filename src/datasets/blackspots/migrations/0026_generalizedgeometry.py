@@ -0,0 +1,84 @@
+# Generated by Django 4.1.13 on 2026-10-18 16:05
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def generalize_geometries(apps, schema_editor):
+    # the tolerances of api.generalization.LEVELS when the table was added
+    schema_editor.execute(
+        """
+        INSERT INTO blackspots_generalizedgeometry (spot_id, resolution, wegvak, polygoon)
+        SELECT
+            spot.id,
+            level.resolution,
+            ST_SimplifyPreserveTopology(spot.wegvak, level.tolerance),
+            ST_SimplifyPreserveTopology(spot.polygoon, level.tolerance)
+        FROM blackspots_spot AS spot
+        CROSS JOIN (
+            VALUES ('low', 0.0005), ('medium', 0.00005), ('high', 0.00001)
+        ) AS level (resolution, tolerance)
+        """
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("blackspots", "0025_datasetversion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GeneralizedGeometry",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[
+                            ("low", "low"),
+                            ("medium", "medium"),
+                            ("high", "high"),
+                        ],
+                        max_length=8,
+                    ),
+                ),
+                (
+                    "wegvak",
+                    django.contrib.gis.db.models.fields.LineStringField(
+                        blank=True, null=True, srid=4326
+                    ),
+                ),
+                (
+                    "polygoon",
+                    django.contrib.gis.db.models.fields.PolygonField(
+                        blank=True, null=True, srid=4326
+                    ),
+                ),
+                (
+                    "spot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="generalized_geometries",
+                        to="blackspots.spot",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="generalizedgeometry",
+            constraint=models.UniqueConstraint(
+                fields=("spot", "resolution"), name="unique_spot_resolution"
+            ),
+        ),
+        migrations.RunPython(generalize_geometries, migrations.RunPython.noop),
+    ]
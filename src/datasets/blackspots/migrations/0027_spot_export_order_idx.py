@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("blackspots", "0026_generalizedgeometry"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="spot",
+            index=models.Index(
+                fields=["stadsdeel", "spot_type", "id"], name="spot_export_order_idx"
+            ),
+        ),
+    ]
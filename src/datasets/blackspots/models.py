@@ -2,6 +2,9 @@ from django.contrib.gis.db import models
 from django.utils.text import get_valid_filename
 from djchoices import ChoiceItem, DjangoChoices
 
+# import_hash of an imported spot that was edited through the API, which no row hashes to
+EDITED_IMPORT_HASH = "edited"
+
 
 class Spot(models.Model):
     class StatusChoice(DjangoChoices):
@@ -40,9 +43,12 @@ class Spot(models.Model):
     locatie_id = models.CharField(unique=True, max_length=16)
     spot_type = models.CharField(max_length=24, choices=SpotType.choices)
     description = models.CharField(max_length=120)
-    point = models.PointField(srid=4326, null=True, blank=True)
-    wegvak = models.LineStringField(srid=4326, null=True, blank=True)
-    polygoon = models.PolygonField(srid=4326, null=True, blank=True)
+    # GiST indexes, used by the bbox, near and within filters of the api
+    point = models.PointField(srid=4326, null=True, blank=True, spatial_index=True)
+    wegvak = models.LineStringField(
+        srid=4326, null=True, blank=True, spatial_index=True
+    )
+    polygoon = models.PolygonField(srid=4326, null=True, blank=True, spatial_index=True)
 
     stadsdeel = models.CharField(max_length=3, choices=Stadsdelen.choices)
 
@@ -60,6 +66,19 @@ class Spot(models.Model):
     jaar_oplevering = models.IntegerField(null=True, blank=True)
     jaar_opgenomen_in_ivm_lijst = models.IntegerField(null=True, blank=True)
 
+    # hash of the spreadsheet row this spot was last imported from, used to skip
+    # unchanged rows. EDITED_IMPORT_HASH once the spot is edited through the API, and
+    # None for spots created through the API, which the import leaves alone.
+    import_hash = models.CharField(null=True, blank=True, max_length=64)
+
+    class Meta:
+        indexes = [
+            # ordering of the csv export and its cursor pagination
+            models.Index(
+                fields=["stadsdeel", "spot_type", "id"], name="spot_export_order_idx"
+            )
+        ]
+
     def __str__(self):
         return f"{self.locatie_id}: {self.spot_type}"
 
@@ -92,3 +111,70 @@ class Document(models.Model):
         )
         base_filename = f"{self.spot.locatie_id}_{doc_type}_{self.spot.description}.pdf"
         return get_valid_filename(base_filename)
+
+
+class GeneralizedGeometry(models.Model):
+    """
+    Simplified wegvak and polygoon of a spot, served to overview maps, see
+    api.generalization
+    """
+
+    class Resolution(DjangoChoices):
+        low = ChoiceItem()
+        medium = ChoiceItem()
+        high = ChoiceItem()
+
+    spot = models.ForeignKey(
+        Spot, related_name="generalized_geometries", on_delete=models.CASCADE
+    )
+    resolution = models.CharField(max_length=8, choices=Resolution.choices)
+    wegvak = models.LineStringField(srid=4326, null=True, blank=True)
+    polygoon = models.PolygonField(srid=4326, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["spot", "resolution"], name="unique_spot_resolution"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.spot_id}: {self.resolution}"
+
+
+class Stadsdeel(models.Model):
+    """
+    Stadsdeel boundaries, used to determine the stadsdeel of a spot locally
+    """
+
+    code = models.CharField(unique=True, max_length=3, choices=Spot.Stadsdelen.choices)
+    naam = models.CharField(max_length=64)
+    geometrie = models.MultiPolygonField(srid=4326)
+
+    def __str__(self):
+        return self.naam
+
+
+class ImportedFile(models.Model):
+    """
+    Content hash of the last successfully imported spreadsheet
+    """
+
+    name = models.CharField(unique=True, max_length=256)
+    content_hash = models.CharField(max_length=64)
+    imported_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class DatasetVersion(models.Model):
+    """
+    Version of the spots and documents, incremented on every change
+    """
+
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return str(self.version)
@@ -4,4 +4,5 @@ from . import views
 
 urlpatterns = [
     re_path(r"^health/$", views.health),
+    re_path(r"^health/stadsdeel_cache/$", views.stadsdeel_cache),
 ]
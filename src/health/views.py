@@ -2,7 +2,9 @@ import logging
 
 from django.conf import settings
 from django.db import connection
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+
+from api.stadsdeel_cache import get_stadsdeel_cache
 
 log = logging.getLogger(__name__)
 
@@ -29,3 +31,7 @@ def health(request):
         )
 
     return HttpResponse("Connectivity OK", content_type="text/plain", status=200)
+
+
+def stadsdeel_cache(request):
+    return JsonResponse(get_stadsdeel_cache().stats)
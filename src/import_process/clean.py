@@ -1,6 +1,7 @@
-from datasets.blackspots.models import Document, Spot
+from datasets.blackspots.models import Document, ImportedFile, Spot
 
 
 def clear_models():
     Spot.objects.all().delete()
     Document.objects.all().delete()
+    ImportedFile.objects.all().delete()
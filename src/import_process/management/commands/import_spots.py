@@ -1,12 +1,18 @@
 import logging
 import os
+from contextlib import nullcontext
 from typing import Optional
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
+from api.dataset_version import increment_dataset_version
+from api.generalization import refresh_generalized_geometries
+from api.signals import defer_change_tracking
 from datasets.blackspots.models import Document, Spot
 from import_process.clean import clear_models
+from import_process.management.commands.check_imported_spots import check_import
 from import_process.process_xls import process_xls
 from storage.object_store import ObjectStore
 
@@ -25,24 +31,64 @@ class Command(BaseCommand):
             action="store_true",
             help="add --remove_existing_data to clean all records from the db before importing",
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="add --bulk to write all spots and documents with batched queries",
+        )
+        parser.add_argument(
+            "--atomic",
+            action="store_true",
+            help="add --atomic to import and check in a single transaction, "
+            "which is rolled back when the check fails",
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="add --incremental to only write the spots that changed since the "
+            "previous import and remove the ones no longer in the spreadsheet",
+        )
 
     def handle(self, *args, **options):
         if not (xls_path := options.get("xls_path")):
             assert os.getenv("OBJECTSTORE_PASSWORD")
-        perform_import(xls_path, options["remove_existing_data"])
+        perform_import(
+            xls_path,
+            options["remove_existing_data"],
+            bulk=options["bulk"],
+            atomic=options["atomic"],
+            incremental=options["incremental"],
+        )
 
 
-def perform_import(xls_path: Optional[str], remove_existing_data: bool):
+def has_changes(counts: Optional[dict], remove_existing_data: bool) -> bool:
+    """
+    :param counts: counts returned by process_xls, None when they are not counted
+    :return: False when the import inserted, updated and deleted no spots
+    """
+    if remove_existing_data or counts is None:
+        return True
+    return any(counts[key] for key in ["inserted", "updated", "deleted"])
+
+
+def perform_import(
+    xls_path: Optional[str],
+    remove_existing_data: bool,
+    bulk: bool = False,
+    atomic: bool = False,
+    incremental: bool = False,
+):
     """
     Perform an import from new spots and documents
     :param xls_path: path to the file to process, if None will be downloaded from the object store
     :param remove_existing_data: adding the parameter --remove_existing_data will clear all the records before importing
+    :param bulk: adding the parameter --bulk will upsert all rows with batched queries
+    :param atomic: adding the parameter --atomic will clear, import and check the data in
+    a single transaction, so readers keep seeing the previous data until it is committed
+    :param incremental: adding the parameter --incremental will skip unchanged rows, or
+    the whole file when it did not change since the previous import
     """
 
-    if remove_existing_data:
-        log.info("Clearing models")
-        clear_models()
-
     document_list = None
     if xls_path is None:
         objstore = ObjectStore(config=settings.OBJECTSTORE_CONNECTION_CONFIG)
@@ -57,8 +103,30 @@ def perform_import(xls_path: Optional[str], remove_existing_data: bool):
         log.info("Fetching xls file")
         xls_path = objstore.fetch_spots(connection)
 
-    log.info("Importing xls file")
-    process_xls(xls_path, document_list)
-
+    with transaction.atomic() if atomic else nullcontext():
+        # tracked once for the whole import below
+        with defer_change_tracking():
+            if remove_existing_data:
+                log.info("Clearing models")
+                clear_models()
+
+            log.info("Importing xls file")
+            counts = process_xls(
+                xls_path, document_list, bulk=bulk, incremental=incremental
+            )
+
+        if has_changes(counts, remove_existing_data):
+            refresh_generalized_geometries()
+            increment_dataset_version()
+
+        if atomic:
+            # raises when the import is incomplete, which rolls back the transaction
+            check_import()
+
+    if counts:
+        log.info(
+            f"Spots inserted: {counts['inserted']}, updated: {counts['updated']}, "
+            f"unchanged: {counts['unchanged']}, deleted: {counts['deleted']}"
+        )
     log.info(f"Spot count: {Spot.objects.all().count()}")
     log.info(f"Document count: {Document.objects.all().count()}")
@@ -1,17 +1,24 @@
+import hashlib
+import json
 import logging
+import os
 from ast import literal_eval
-from typing import Optional
+from typing import List, Optional, Set, Tuple
 
 import xlrd
 from django.contrib.gis.geos import Point, Polygon
 from xlrd import open_workbook
 
-from datasets.blackspots.models import Document, Spot
+from datasets.blackspots.models import EDITED_IMPORT_HASH, Document, ImportedFile, Spot
 from import_process import util
 from storage.object_store import DocumentList
 
 log = logging.getLogger(__name__)
 
+# number of rows written per query in bulk mode
+BULK_BATCH_SIZE = 500
+HASH_CHUNK_SIZE = 64 * 1024
+
 EXCEL_STRUCTURE = {
     "number": {"column_idx": 0, "header": "Nummer"},
     "description": {"column_idx": 1, "header": "Locatie omschrijving"},
@@ -38,6 +45,27 @@ EXCEL_STRUCTURE = {
 }
 
 
+# all spot fields the import writes, except the locatie_id used as lookup key
+SPOT_UPDATE_FIELDS = [
+    "actiehouders",
+    "spot_type",
+    "description",
+    "point",
+    "polygoon",
+    "stadsdeel",
+    "status",
+    "start_uitvoering",
+    "eind_uitvoering",
+    "tasks",
+    "notes",
+    "jaar_blackspotlijst",
+    "jaar_ongeval_quickscan",
+    "jaar_oplevering",
+    "jaar_opgenomen_in_ivm_lijst",
+    "import_hash",
+]
+
+
 def get_sheet_cell(sheet, column_name, row_idx):
     value = EXCEL_STRUCTURE.get(column_name)
     assert value is not None, f"column name not recognised: {column_name}"
@@ -160,33 +188,45 @@ def get_polygoon(input: str):
     return None
 
 
+def is_document_available(
+    document_list: DocumentList, doc_type: Document.DocumentType, filename: str
+) -> bool:
+    if not filename or len(filename) == 0 or not document_list:
+        return False
+
+    available_filenames = [filename for [_, filename] in document_list]
+    if filename not in available_filenames:
+        log_error(f"Missing file on object store: {filename} of type {doc_type}")
+        return False
+
+    return True
+
+
 def create_document(
     document_list: DocumentList,
     doc_type: Document.DocumentType,
     filename: str,
     spot: Spot,
 ):
-    if not filename or len(filename) == 0 or not document_list:
-        return
-
-    available_filenames = [filename for [_, filename] in document_list]
-    if filename not in available_filenames:
-        log_error(f"Missing file on object store: {filename} of type {doc_type}")
+    if not is_document_available(document_list, doc_type, filename):
         return
 
     Document.objects.create(type=doc_type, filename=filename, spot=spot)
 
 
+def update_spot_fields(spot: Spot, spot_data: dict):
+    for key, value in spot_data.items():
+        if value is not None and hasattr(spot, key):
+            setattr(spot, key, value)
+
+
 def upsert_spot(spot_data: dict):
     """
     Upsert a spot if the spot already exists else create the spot with the spot data
     """
     try:
         spot = Spot.objects.get(locatie_id=spot_data["locatie_id"])
-
-        for key, value in spot_data.items():
-            if value is not None and hasattr(spot, key):
-                setattr(spot, key, value)
+        update_spot_fields(spot, spot_data)
         spot.save()
 
     except Spot.DoesNotExist as e:
@@ -195,86 +235,267 @@ def upsert_spot(spot_data: dict):
     return spot
 
 
-def process_xls(xls_path, document_list: Optional[DocumentList]):
-    book = open_workbook(xls_path)
+def parse_row(sheet, row_idx, date_mode) -> Optional[dict]:
+    """
+    Parse a single sheet row into spot data, returns None if the row should be skipped
+    """
+    # one of point or wegvaks should be present
+    latitude = get_sheet_cell(sheet, "lat", row_idx)
+    longitude = get_sheet_cell(sheet, "lng", row_idx)
+    wegvak = get_sheet_cell(sheet, "wegvak", row_idx)
 
-    sheet = book.sheet_by_index(0)
+    point, polygoon = None, None
+    try:
+        point = Point(longitude, latitude)
+    except Exception as point_e:
+        try:
+            polygoon = get_polygoon(wegvak)
+        except Exception as polygoon_e:
+            log_error(
+                f"Unknown point/wegvak: {latitude}, {longitude} : "
+                f' "{point_e}", {wegvak}: "{polygoon_e}", skipping'
+            )
+            return None
+
+    stadsdeel = get_stadsdeel(get_sheet_cell(sheet, "stadsdeel", row_idx))
+
+    jaar_blackspotlijst = get_integer(
+        get_sheet_cell(sheet, "jaar_blackspot", row_idx), "blackspotlijst"
+    )
+    jaar_quickscan = get_integer(
+        get_sheet_cell(sheet, "jaar_quickscan", row_idx), "quickscan"
+    )
+    try:
+        spot_type = get_spot_type(get_sheet_cell(sheet, "type", row_idx))
+        status = get_status(get_sheet_cell(sheet, "status", row_idx))
+    except SkipError as e:
+        log_error(f'"{e}", skipping')
+        return None
 
-    check_column_names(sheet)
+    return {
+        "locatie_id": get_sheet_cell(sheet, "number", row_idx),
+        "actiehouders": get_sheet_cell(sheet, "actiehouders", row_idx),
+        "spot_type": spot_type,
+        "description": get_sheet_cell(sheet, "description", row_idx),
+        "point": point,
+        "polygoon": polygoon,
+        "stadsdeel": stadsdeel,
+        "status": status,
+        "start_uitvoering": get_sheet_date_cell(
+            sheet, "start_uitvoering", row_idx, date_mode
+        ),
+        "eind_uitvoering": get_sheet_date_cell(
+            sheet, "eind_uitvoering", row_idx, date_mode
+        ),
+        "tasks": get_sheet_cell(sheet, "tasks", row_idx),
+        "notes": get_sheet_cell(sheet, "notes", row_idx),
+        "jaar_blackspotlijst": jaar_blackspotlijst,
+        "jaar_ongeval_quickscan": jaar_quickscan,
+        "jaar_oplevering": get_integer(
+            get_sheet_cell(sheet, "jaar_oplevering", row_idx), "oplevering"
+        ),
+        "jaar_opgenomen_in_ivm_lijst": get_integer(
+            get_sheet_cell(sheet, "jaar_opgenomen_in_ivm_lijst", row_idx),
+            "jaar_opgenomen_in_ivm_lijst",
+        ),
+    }
 
-    for row_idx in range(1, sheet.nrows):
-        # one of point or wegvaks should be present
-        latitude = get_sheet_cell(sheet, "lat", row_idx)
-        longitude = get_sheet_cell(sheet, "lng", row_idx)
-        wegvak = get_sheet_cell(sheet, "wegvak", row_idx)
 
-        point, polygoon = None, None
-        try:
-            point = Point(longitude, latitude)
-        except Exception as point_e:
-            try:
-                polygoon = get_polygoon(wegvak)
-            except Exception as polygoon_e:
-                log_error(
-                    f"Unknown point/wegvak: {latitude}, {longitude} : "
-                    f' "{point_e}", {wegvak}: "{polygoon_e}", skipping'
-                )
-                continue
+def get_row_hash(spot_data: dict, rapportage: str, ontwerp: str) -> str:
+    content = json.dumps([spot_data, rapportage, ontwerp], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode()).hexdigest()
 
-        stadsdeel = get_stadsdeel(get_sheet_cell(sheet, "stadsdeel", row_idx))
 
-        jaar_blackspotlijst = get_integer(
-            get_sheet_cell(sheet, "jaar_blackspot", row_idx), "blackspotlijst"
-        )
-        jaar_quickscan = get_integer(
-            get_sheet_cell(sheet, "jaar_quickscan", row_idx), "quickscan"
-        )
-        try:
-            spot_type = get_spot_type(get_sheet_cell(sheet, "type", row_idx))
-            status = get_status(get_sheet_cell(sheet, "status", row_idx))
-        except SkipError as e:
-            log_error(f'"{e}", skipping')
+def get_file_hash(xls_path: str, document_list: Optional[DocumentList]) -> str:
+    """
+    Hash the spreadsheet together with the available documents, as both determine
+    the outcome of an import
+    """
+    file_hash = hashlib.sha256()
+    with open(xls_path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            file_hash.update(chunk)
+    file_hash.update(json.dumps(sorted(document_list or [])).encode())
+    return file_hash.hexdigest()
+
+
+def read_rows(
+    sheet, date_mode, document_list: Optional[DocumentList]
+) -> List[Tuple[dict, str, str]]:
+    """
+    Read all importable rows of the sheet into memory
+    :return: list of (spot_data, rapportage filename, ontwerp filename), the
+    filename is None when the document is not available on the object store
+    """
+    rows = []
+    for row_idx in range(1, sheet.nrows):
+        spot_data = parse_row(sheet, row_idx, date_mode)
+        if spot_data is None:
             continue
-        spot_data = {
-            "locatie_id": get_sheet_cell(sheet, "number", row_idx),
-            "actiehouders": get_sheet_cell(sheet, "actiehouders", row_idx),
-            "spot_type": spot_type,
-            "description": get_sheet_cell(sheet, "description", row_idx),
-            "point": point,
-            "polygoon": polygoon,
-            "stadsdeel": stadsdeel,
-            "status": status,
-            "start_uitvoering": get_sheet_date_cell(
-                sheet, "start_uitvoering", row_idx, book.datemode
-            ),
-            "eind_uitvoering": get_sheet_date_cell(
-                sheet, "eind_uitvoering", row_idx, book.datemode
-            ),
-            "tasks": get_sheet_cell(sheet, "tasks", row_idx),
-            "notes": get_sheet_cell(sheet, "notes", row_idx),
-            "jaar_blackspotlijst": jaar_blackspotlijst,
-            "jaar_ongeval_quickscan": jaar_quickscan,
-            "jaar_oplevering": get_integer(
-                get_sheet_cell(sheet, "jaar_oplevering", row_idx), "oplevering"
-            ),
-            "jaar_opgenomen_in_ivm_lijst": get_integer(
-                get_sheet_cell(sheet, "jaar_opgenomen_in_ivm_lijst", row_idx),
-                "jaar_opgenomen_in_ivm_lijst",
-            ),
-        }
 
-        spot = upsert_spot(spot_data)
+        rapportage = get_sheet_cell(sheet, "rapportage", row_idx)
+        if not is_document_available(
+            document_list, Document.DocumentType.Rapportage, rapportage
+        ):
+            rapportage = None
+
+        ontwerp = get_sheet_cell(sheet, "ontwerp", row_idx)
+        if not is_document_available(
+            document_list, Document.DocumentType.Ontwerp, ontwerp
+        ):
+            ontwerp = None
 
-        create_document(
-            document_list,
-            Document.DocumentType.Rapportage,
-            get_sheet_cell(sheet, "rapportage", row_idx),
-            spot,
+        spot_data["import_hash"] = get_row_hash(spot_data, rapportage, ontwerp)
+        rows.append((spot_data, rapportage, ontwerp))
+    return rows
+
+
+def get_sheet_locatie_ids(sheet) -> Set[str]:
+    """
+    :return: locatie_ids of all rows of the sheet, including the rows that are skipped
+    """
+    return {
+        get_sheet_cell(sheet, "number", row_idx) for row_idx in range(1, sheet.nrows)
+    }
+
+
+def bulk_upsert_spots(
+    rows: List[Tuple[dict, str, str]],
+    batch_size: int = BULK_BATCH_SIZE,
+    incremental: bool = False,
+    sheet_locatie_ids: Optional[Set[str]] = None,
+) -> dict:
+    """
+    Upsert all rows using a single lookup query and batched inserts and updates,
+    instead of a number of queries per row as done by upsert_spot and create_document
+    :param rows: rows as read by read_rows, with the filenames of the available
+    documents only
+    :param incremental: skip rows whose import_hash did not change and delete
+    previously imported spots that are no longer in the sheet
+    :param sheet_locatie_ids: locatie_ids of all rows of the sheet, see
+    get_sheet_locatie_ids. Spots of rows that could not be parsed are kept. Defaults
+    to the locatie_ids of the rows.
+    :return: counts of inserted, updated, unchanged and deleted spots
+    """
+    existing_spots = Spot.objects.in_bulk(field_name="locatie_id")
+    existing_documents = set(
+        Document.objects.values_list("spot_id", "type", "filename")
+    )
+
+    new_spots = {}
+    updated_spots = {}
+    unchanged_spots = {}
+    documents = []
+    for spot_data, rapportage, ontwerp in rows:
+        locatie_id = spot_data["locatie_id"]
+        spot = new_spots.get(locatie_id) or existing_spots.get(locatie_id)
+        if spot is None:
+            spot = Spot(**spot_data)
+            new_spots[locatie_id] = spot
+        elif incremental and spot.import_hash == spot_data["import_hash"]:
+            unchanged_spots[locatie_id] = spot
+            continue
+        else:
+            update_spot_fields(spot, spot_data)
+            if spot.pk is not None:
+                updated_spots[locatie_id] = spot
+
+        for doc_type, filename in [
+            (Document.DocumentType.Rapportage, rapportage),
+            (Document.DocumentType.Ontwerp, ontwerp),
+        ]:
+            if not filename or (spot.pk, doc_type, filename) in existing_documents:
+                continue
+            documents.append(Document(type=doc_type, filename=filename, spot=spot))
+
+    deleted_count = 0
+    if incremental:
+        if sheet_locatie_ids is None:
+            sheet_locatie_ids = {spot_data["locatie_id"] for spot_data, _, _ in rows}
+        removed_ids = [
+            spot.pk
+            for locatie_id, spot in existing_spots.items()
+            if spot.import_hash is not None and locatie_id not in sheet_locatie_ids
+        ]
+        deleted_count = (
+            Spot.objects.filter(pk__in=removed_ids).delete()[1].get(Spot._meta.label, 0)
         )
 
-        create_document(
-            document_list,
-            Document.DocumentType.Ontwerp,
-            get_sheet_cell(sheet, "ontwerp", row_idx),
-            spot,
+    # bulk_create sets the primary keys on Postgres, so the documents can refer to them
+    Spot.objects.bulk_create(new_spots.values(), batch_size=batch_size)
+    Spot.objects.bulk_update(
+        updated_spots.values(), fields=SPOT_UPDATE_FIELDS, batch_size=batch_size
+    )
+    Document.objects.bulk_create(documents, batch_size=batch_size)
+
+    counts = {
+        "inserted": len(new_spots),
+        "updated": len(updated_spots),
+        "unchanged": len(unchanged_spots),
+        "deleted": deleted_count,
+    }
+    log.info(f"Bulk import: {counts}, {len(documents)} documents created")
+    return counts
+
+
+def process_xls(
+    xls_path,
+    document_list: Optional[DocumentList],
+    bulk: bool = False,
+    incremental: bool = False,
+) -> Optional[dict]:
+    """
+    Import the spots from the spreadsheet
+    :param bulk: upsert all rows with batched queries
+    :param incremental: only write the rows that changed since the previous import,
+    skipping the whole file when it is unchanged. Implies bulk.
+    :return: counts of inserted, updated, unchanged and deleted spots in (incremental) bulk mode
+    """
+    file_hash = None
+    if incremental:
+        name = os.path.basename(xls_path)
+        file_hash = get_file_hash(xls_path, document_list)
+        # imported spots edited through the API are restored from the sheet by a full
+        # read, spots created through the API are not in it
+        if (
+            not Spot.objects.filter(import_hash=EDITED_IMPORT_HASH).exists()
+            and ImportedFile.objects.filter(name=name, content_hash=file_hash).exists()
+        ):
+            log.info(f"{name} is unchanged since the previous import, skipping")
+            return {
+                "inserted": 0,
+                "updated": 0,
+                "unchanged": Spot.objects.exclude(import_hash=None).count(),
+                "deleted": 0,
+            }
+
+    book = open_workbook(xls_path)
+
+    sheet = book.sheet_by_index(0)
+
+    check_column_names(sheet)
+
+    rows = read_rows(sheet, book.datemode, document_list)
+
+    if bulk or incremental:
+        counts = bulk_upsert_spots(
+            rows,
+            incremental=incremental,
+            sheet_locatie_ids=get_sheet_locatie_ids(sheet),
         )
+        if file_hash is not None:
+            ImportedFile.objects.update_or_create(
+                name=name, defaults={"content_hash": file_hash}
+            )
+        return counts
+
+    for spot_data, rapportage, ontwerp in rows:
+        spot = upsert_spot(spot_data)
+
+        # the availability of the documents was checked by read_rows
+        for doc_type, filename in [
+            (Document.DocumentType.Rapportage, rapportage),
+            (Document.DocumentType.Ontwerp, ontwerp),
+        ]:
+            if filename:
+                Document.objects.create(type=doc_type, filename=filename, spot=spot)
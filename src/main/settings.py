@@ -155,6 +155,33 @@ if SENTRY_DSN:
     )
 
 BAG_GEO_SEARCH_API_URL = "https://api.data.amsterdam.nl/geosearch/bag/"
+BAG_GEO_SEARCH_API_CONNECT_TIMEOUT = float(
+    os.getenv("BAG_GEO_SEARCH_API_CONNECT_TIMEOUT", 2)
+)
+BAG_GEO_SEARCH_API_READ_TIMEOUT = float(os.getenv("BAG_GEO_SEARCH_API_READ_TIMEOUT", 5))
+# retries of failed connections and 502, 503 and 504 responses, not of read timeouts
+BAG_GEO_SEARCH_API_RETRIES = int(os.getenv("BAG_GEO_SEARCH_API_RETRIES", 2))
+# consecutive failures before lookups are skipped, and seconds until the next try
+BAG_GEO_SEARCH_API_FAILURE_THRESHOLD = int(
+    os.getenv("BAG_GEO_SEARCH_API_FAILURE_THRESHOLD", 5)
+)
+BAG_GEO_SEARCH_API_RESET_TIMEOUT = float(
+    os.getenv("BAG_GEO_SEARCH_API_RESET_TIMEOUT", 30)
+)
+STADSDELEN_GEOJSON_URL = (
+    "https://api.data.amsterdam.nl/v1/gebieden/stadsdelen/"
+    "?_format=geojson&_pageSize=100&eindGeldigheid[isnull]=true"
+)
+# seconds before the stadsdeel boundaries are reloaded from the database
+STADSDEEL_BOUNDARIES_TTL = int(os.getenv("STADSDEEL_BOUNDARIES_TTL", 3600))
+
+# cache of BAG geosearch stadsdeel lookups, keyed by coordinates snapped to a grid
+# of STADSDEEL_CACHE_GRID_SIZE degrees (about 10 meters), 0 entries disables it
+STADSDEEL_CACHE_GRID_SIZE = float(os.getenv("STADSDEEL_CACHE_GRID_SIZE", 0.0001))
+STADSDEEL_CACHE_MAX_SIZE = int(os.getenv("STADSDEEL_CACHE_MAX_SIZE", 10000))
+STADSDEEL_CACHE_TTL = int(os.getenv("STADSDEEL_CACHE_TTL", 24 * 3600))
+# alias of a Django cache to share lookups between processes, unset to disable
+STADSDEEL_CACHE_BACKEND = os.getenv("STADSDEEL_CACHE_BACKEND") or None
 
 OBJECTSTORE_CONNECTION_CONFIG = dict(
     VERSION="2.0",
@@ -266,6 +293,33 @@ SWAGGER_SETTINGS = {
 OBJECTSTORE_UPLOAD_CONTAINER_NAME = os.environ["OBJECTSTORE_UPLOAD_CONTAINER_NAME"]
 OBJECTSTORE_ENV = os.environ["OBJECTSTORE_ENV"]
 
+# local disk cache for documents proxied from the objectstore, 0 disables the cache
+DOCUMENT_CACHE_DIR = os.getenv("DOCUMENT_CACHE_DIR", "/tmp/blackspots/documents/")
+DOCUMENT_CACHE_MAX_SIZE = int(os.getenv("DOCUMENT_CACHE_MAX_SIZE", 256 * 1024 * 1024))
+# seconds after which a cached document is revalidated with the object store
+DOCUMENT_CACHE_MAX_AGE = int(os.getenv("DOCUMENT_CACHE_MAX_AGE", 300))
+
+# cache of the json and geojson spot list and detail responses, keyed on the dataset
+# version, so they are invalidated when spots or documents change. 0 seconds disables
+# the cache
+SPOT_RESPONSE_CACHE = os.getenv("SPOT_RESPONSE_CACHE", "default")
+SPOT_RESPONSE_CACHE_TTL = int(os.getenv("SPOT_RESPONSE_CACHE_TTL", 300))
+
+# precompressed geojson and csv snapshots of all spots and of each stadsdeel
+SPOT_SNAPSHOT_DIR = os.getenv("SPOT_SNAPSHOT_DIR", "/tmp/blackspots/snapshots/")
+
+# seconds that the counts of the paginated spot and document lists are cached in the
+# response cache, 0 seconds disables the cache. Unfiltered lists of tables with at
+# least PAGINATION_COUNT_ESTIMATE_THRESHOLD rows are counted with the estimate of the
+# query planner instead, 0 disables the estimate
+PAGINATION_COUNT_CACHE_TTL = int(os.getenv("PAGINATION_COUNT_CACHE_TTL", 300))
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv("PAGINATION_COUNT_ESTIMATE_THRESHOLD", 100_000)
+)
+
+# seconds that vector tiles of the spots are cached, by the server and clients
+SPOT_TILE_CACHE_TTL = int(os.getenv("SPOT_TILE_CACHE_TTL", 60))
+
 if DEBUG:
     INSTALLED_APPS += (
         "debug_toolbar",
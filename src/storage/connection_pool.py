@@ -0,0 +1,75 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONNECTION_POOL_SIZE = 4
+
+
+class ConnectionPool:
+    """
+    Process wide pool of swift connections, shared by all threads.
+
+    Swiftclient connections keep their auth token and authenticate again when the
+    token is rejected. The pool remembers the most recent token and hands it to
+    newly created connections, so keystone is only contacted when a token expires.
+    """
+
+    def __init__(self, max_size: int = CONNECTION_POOL_SIZE):
+        self._connections = queue.LifoQueue(maxsize=max_size)
+        self._auth_lock = threading.Lock()
+        self._auth = None
+
+    def acquire(self, create_connection: Callable):
+        try:
+            return self._connections.get_nowait()
+        except queue.Empty:
+            pass
+
+        connection = create_connection()
+        with self._auth_lock:
+            if self._auth is not None:
+                connection.url, connection.token = self._auth
+        return connection
+
+    def release(self, connection):
+        token = getattr(connection, "token", None)
+        if token:
+            with self._auth_lock:
+                self._auth = (connection.url, token)
+
+        try:
+            self._connections.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    @contextmanager
+    def connection(self, create_connection: Callable):
+        connection = self.acquire(create_connection)
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+
+_pools: Dict[Tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(config) -> ConnectionPool:
+    key = tuple(sorted(config.items())) if isinstance(config, dict) else config
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool()
+        return _pools[key]
+
+
+def clear_connection_pools():
+    """
+    Drop all pools, their connections are closed when garbage collected
+    """
+    with _pools_lock:
+        _pools.clear()
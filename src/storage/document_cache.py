@@ -0,0 +1,182 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+HEADERS_SUFFIX = ".json"
+DATA_SUFFIX = ".data"
+
+# object store response headers stored next to a cached document
+CACHED_HEADERS = ["content-type", "content-length", "etag", "last-modified"]
+
+
+class DocumentCache:
+    """
+    Bounded local disk cache for documents proxied from the object store.
+
+    Every document is stored in a directory named after the hash of its container
+    path and filename, in a file named after its ETag. The least recently used
+    documents are evicted when the total size exceeds max_size. ObjectStore.upload
+    and delete invalidate the cache entry, documents replaced on the object store
+    directly are found by revalidating the entries older than max_age seconds.
+    """
+
+    def __init__(self, directory: str, max_size: int, max_age: int = 0):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get_entry_dir(self, container_name: str, object_name: str) -> str:
+        key = hashlib.sha256(f"{container_name}/{object_name}".encode()).hexdigest()
+        return os.path.join(self.directory, key)
+
+    def get(self, container_name: str, object_name: str) -> Optional[Tuple[str, dict]]:
+        """
+        :return: path of the cached document and its object store headers
+        """
+        if not self.enabled:
+            return None
+
+        entry_dir = self.get_entry_dir(container_name, object_name)
+        try:
+            filenames = os.listdir(entry_dir)
+        except FileNotFoundError:
+            return None
+
+        for filename in filenames:
+            if not filename.endswith(HEADERS_SUFFIX):
+                continue
+            base_path = os.path.join(entry_dir, filename[: -len(HEADERS_SUFFIX)])
+            try:
+                with open(f"{base_path}{HEADERS_SUFFIX}") as file:
+                    headers = json.load(file)
+                # mark as recently used
+                os.utime(f"{base_path}{DATA_SUFFIX}")
+            except (OSError, ValueError):
+                continue
+            return f"{base_path}{DATA_SUFFIX}", headers
+        return None
+
+    def is_stale(self, path: str) -> bool:
+        """
+        :param path: path of the cached document, as returned by get
+        :return: True when the document was stored or validated max_age seconds ago
+        """
+        headers_path = f"{path[: -len(DATA_SUFFIX)]}{HEADERS_SUFFIX}"
+        try:
+            validated_at = os.stat(headers_path).st_mtime
+        except FileNotFoundError:
+            return True
+        return time.time() - validated_at >= self.max_age
+
+    def mark_validated(self, path: str):
+        try:
+            os.utime(f"{path[: -len(DATA_SUFFIX)]}{HEADERS_SUFFIX}")
+        except FileNotFoundError:
+            pass
+
+    def store(
+        self, container_name: str, object_name: str, headers: dict, chunks: Iterable
+    ):
+        """
+        Pass the chunks through while writing them to the cache. The document is only
+        added to the cache after all chunks have been read.
+        """
+        etag = headers.get("etag", "").strip('"')
+        if not self.enabled or not etag:
+            yield from chunks
+            return
+
+        entry_dir = self.get_entry_dir(container_name, object_name)
+        base_path = os.path.join(entry_dir, etag)
+        os.makedirs(entry_dir, exist_ok=True)
+        # unique per writer, the threads of a process may store the same document
+        fd, temp_path = tempfile.mkstemp(dir=entry_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                    yield chunk
+
+            with open(f"{base_path}{HEADERS_SUFFIX}", "w") as file:
+                json.dump(
+                    {
+                        header: headers[header]
+                        for header in CACHED_HEADERS
+                        if header in headers
+                    },
+                    file,
+                )
+            os.replace(temp_path, f"{base_path}{DATA_SUFFIX}")
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        self.remove_other_versions(entry_dir, etag)
+        self.evict()
+
+    def remove_other_versions(self, entry_dir: str, etag: str):
+        for filename in os.listdir(entry_dir):
+            if filename in [f"{etag}{DATA_SUFFIX}", f"{etag}{HEADERS_SUFFIX}"]:
+                continue
+            if filename.endswith(DATA_SUFFIX) or filename.endswith(HEADERS_SUFFIX):
+                try:
+                    os.remove(os.path.join(entry_dir, filename))
+                except FileNotFoundError:
+                    pass
+
+    def invalidate(self, container_name: str, object_name: str):
+        shutil.rmtree(
+            self.get_entry_dir(container_name, object_name), ignore_errors=True
+        )
+
+    def evict(self):
+        """
+        Remove the least recently used documents until the cache fits in max_size
+        """
+        entries = []
+        for entry_dir in os.scandir(self.directory):
+            if not entry_dir.is_dir():
+                continue
+            for entry in os.scandir(entry_dir.path):
+                if not entry.name.endswith(DATA_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # evicted or invalidated by another process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                return
+            logger.debug(f"Evicting {path} from the document cache")
+            base_path = path[: -len(DATA_SUFFIX)]
+            for suffix in [DATA_SUFFIX, HEADERS_SUFFIX]:
+                try:
+                    os.remove(f"{base_path}{suffix}")
+                except FileNotFoundError:
+                    pass
+            total_size -= size
+
+
+def get_document_cache() -> DocumentCache:
+    return DocumentCache(
+        settings.DOCUMENT_CACHE_DIR,
+        settings.DOCUMENT_CACHE_MAX_SIZE,
+        settings.DOCUMENT_CACHE_MAX_AGE,
+    )
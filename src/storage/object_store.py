@@ -1,12 +1,15 @@
+import hashlib
 import logging
 import os
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 from django.conf import settings
 from objectstore import get_connection, get_full_container_list
 from swiftclient import ClientException
 
 from datasets.blackspots.models import Document
+from storage.connection_pool import get_connection_pool
+from storage.document_cache import get_document_cache
 
 DIR_CONTENT_TYPE = "application/directory"
 
@@ -14,6 +17,8 @@ XLS_OBJECT_NAME = "VVP_Blackspot_Voortgangslijst_Kaart_actueel.xls"
 DOWNLOAD_DIR = "/tmp/blackspots/"
 WBA_CONTAINER_NAME = f"wbalijst"
 DOC_CONTAINER_NAME = f"doc"
+HASH_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
 DocumentList = List[Tuple[str, str]]
 
@@ -29,29 +34,58 @@ class ObjectStore:
         connection = get_connection(self.config)
         return connection
 
+    def acquire_connection(self):
+        """
+        Get a connection from the process wide pool, it must be handed back with
+        release_connection when done
+        """
+        return get_connection_pool(self.config).acquire(self.get_connection)
+
+    def release_connection(self, connection):
+        get_connection_pool(self.config).release(connection)
+
+    def pooled_connection(self):
+        return get_connection_pool(self.config).connection(self.get_connection)
+
     def upload(self, file, document: Document):
         logger.info(f"Uploading {file} to objectstore: {document.filename}")
-        connection = self.get_connection()
-
         container_path = ObjectStore.get_container_path(document.type)
-        connection.put_object(container_path, document.filename, file)
+        with self.pooled_connection() as connection:
+            connection.put_object(container_path, document.filename, file)
+        get_document_cache().invalidate(container_path, document.filename)
         logger.info("Done uploading to objectstore")
 
     def delete(self, document: Document):
         logger.info(f"Deleting file {document.filename}")
-        connection = self.get_connection()
-
         container_path = ObjectStore.get_container_path(document.type)
-        try:
-            connection.delete_object(container_path, document.filename)
-        except ClientException:
-            logger.info(f"Failed to delete object for document id {document.id}")
+        with self.pooled_connection() as connection:
+            try:
+                connection.delete_object(container_path, document.filename)
+            except ClientException:
+                logger.info(f"Failed to delete object for document id {document.id}")
+        get_document_cache().invalidate(container_path, document.filename)
 
         logger.info("Done deleting file from objectstore")
 
-    def get_document(self, connection, container_name: str, object_name: str):
+    def get_document(
+        self,
+        connection,
+        container_name: str,
+        object_name: str,
+        headers: Optional[dict] = None,
+    ):
+        """
+        Get the headers and a chunked body iterator of the document, the body is
+        only read from the object store while iterating over it
+        :param headers: extra request headers, e.g. Range or If-None-Match
+        """
         logger.debug(f"Fetching file from objectstore: {container_name}, {object_name}")
-        return connection.get_object(container_name, object_name)
+        return connection.get_object(
+            container_name,
+            object_name,
+            resp_chunk_size=DOWNLOAD_CHUNK_SIZE,
+            headers=headers,
+        )
 
     def get_wba_documents_list(self, connection) -> DocumentList:
         """
@@ -72,7 +106,8 @@ class ObjectStore:
 
     def get_file(self, connection, container_name: str, path: str, object_name: str):
         """
-        Download the file from stack and store write it to the temp download folder
+        Download the file from stack and store write it to the temp download folder,
+        an earlier download is reused when it is unchanged on the object store
         :param connection: swiftclient connection object
         :param container_name The name of the container(acc or prod)
         :param path: the path where the object is stored you want to download
@@ -83,12 +118,55 @@ class ObjectStore:
             f"{DOWNLOAD_DIR}{container_name}/{path}", object_name
         )
 
+        if os.path.isfile(output_path) and self.is_unchanged(
+            connection, container_name, f"{path}/{object_name}", output_path
+        ):
+            logger.info(f"Using cached file: {path}/{object_name}")
+            return output_path
+
         logger.info(f"Fetching file: {path}/{object_name}")
-        new_data = connection.get_object(container_name, f"{path}/{object_name}")[1]
-        with open(output_path, "wb") as file:
-            file.write(new_data)
+        _, chunks = connection.get_object(
+            container_name,
+            f"{path}/{object_name}",
+            resp_chunk_size=DOWNLOAD_CHUNK_SIZE,
+        )
+
+        # write to a temporary file first, so a failed download never leaves a
+        # truncated file at the output path
+        temp_path = f"{output_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                for chunk in chunks:
+                    file.write(chunk)
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
         return output_path
 
+    def is_unchanged(
+        self, connection, container_name: str, object_name: str, local_path: str
+    ) -> bool:
+        """
+        Compare the ETag of the stored object to the local copy. Swift uses the MD5
+        hash of the content as ETag, so no separate record of the last ETag is needed.
+        """
+        etag = self.get_etag(connection, container_name, object_name)
+        return etag is not None and etag == get_file_md5(local_path)
+
+    def get_etag(
+        self, connection, container_name: str, object_name: str
+    ) -> Optional[str]:
+        """
+        :return: the unquoted ETag of the stored object, None when it is not found
+        """
+        try:
+            headers = connection.head_object(container_name, object_name)
+        except ClientException as e:
+            logger.info(f"Failed to get headers of {object_name}: {e}")
+            return None
+        return headers.get("etag", "").strip('"')
+
     def fetch_spots(self, connection):
         return self.get_file(
             connection, settings.OBJECTSTORE_ENV, WBA_CONTAINER_NAME, XLS_OBJECT_NAME
@@ -100,3 +178,11 @@ class ObjectStore:
             return f"{settings.OBJECTSTORE_UPLOAD_CONTAINER_NAME}/doc/ontwerp"
         else:
             return f"{settings.OBJECTSTORE_UPLOAD_CONTAINER_NAME}/doc/rapportage"
+
+
+def get_file_md5(path: str) -> str:
+    md5 = hashlib.md5()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            md5.update(chunk)
+    return md5.hexdigest()
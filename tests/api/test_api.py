@@ -1,3 +1,4 @@
+import json
 import logging
 import random
 from unittest import mock
@@ -6,8 +7,9 @@ from django.test import TransactionTestCase
 from model_bakery import baker, seq
 from rest_framework.reverse import reverse
 
+from api.serializers import SpotGeojsonSerializer
 from datasets.blackspots import models
-from datasets.blackspots.models import Document, Spot
+from datasets.blackspots.models import EDITED_IMPORT_HASH, Document, Spot
 from tests.api.authzsetup import AuthorizationSetup
 
 log = logging.getLogger(__name__)
@@ -87,10 +89,18 @@ class TestAPIEndpoints(TransactionTestCase, AuthorizationSetup):
         response = self.read_client.get(url)
 
         self.assertStatusCode(url, response)
-        data = response.data
+        data = json.loads(b"".join(response.streaming_content))
         self.assertEqual(data.get("type"), "FeatureCollection")
         self.assertEqual(len(data.get("features")), 4)
 
+        # the features built by the database match the serializer
+        expected = SpotGeojsonSerializer(
+            Spot.objects.order_by("pk"),
+            many=True,
+            context={"request": response.wsgi_request},
+        ).data
+        self.assertEqual(data, json.loads(json.dumps(expected)))
+
     def test_spot_list_geojson_auth_error(self):
         url = reverse("spot-list", format="geojson")
 
@@ -197,6 +207,21 @@ class TestAPIEndpoints(TransactionTestCase, AuthorizationSetup):
             Spot.objects.filter(actiehouders="Someone", locatie_id="test_1").exists()
         )
 
+    def test_spot_detail_patch_import_hash(self):
+        spot = Spot.objects.get(locatie_id="test_1")
+        url = reverse("spot-detail", [spot.id])
+        data = {"actiehouders": "Someone"}
+
+        # created through the API, the import leaves it alone
+        self.write_client.patch(url, data=data)
+        spot.refresh_from_db()
+        self.assertIsNone(spot.import_hash)
+
+        Spot.objects.filter(id=spot.id).update(import_hash="hash1")
+        self.write_client.patch(url, data=data)
+        spot.refresh_from_db()
+        self.assertEqual(spot.import_hash, EDITED_IMPORT_HASH)
+
     def test_spot_detail_patch_auth_error(self):
         spot = Spot.objects.get(locatie_id="test_1")
         url = reverse("spot-detail", [spot.id])
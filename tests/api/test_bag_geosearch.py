@@ -2,13 +2,24 @@ from unittest import TestCase
 from unittest.mock import Mock, patch
 
 from requests import ConnectionError, HTTPError, Timeout, TooManyRedirects
+from urllib3.exceptions import MaxRetryError, ReadTimeoutError
 
-from api.bag_geosearch import BagGeoSearchAPI
+from api.bag_geosearch import (
+    BagGeoSearchAPI,
+    CircuitBreaker,
+    circuit_breaker,
+    create_session,
+)
+from api.stadsdeel_cache import get_stadsdeel_cache
 from datasets.blackspots.models import Spot
 
 
 class TestBagGeoSearchAPI(TestCase):
-    @patch("api.bag_geosearch.requests")
+    def setUp(self):
+        get_stadsdeel_cache().clear()
+        circuit_breaker.reset()
+
+    @patch("api.bag_geosearch.session")
     def test_get_stadsdeel(self, mocked_requests):
         mocked_response = Mock()
         mocked_response.json.return_value = {
@@ -31,7 +42,7 @@ class TestBagGeoSearchAPI(TestCase):
         stadsdeel = BagGeoSearchAPI().get_stadsdeel(lat=52.370216, lon=4.895168)
         self.assertEqual(stadsdeel, expected_stadsdeel)
 
-    @patch("api.bag_geosearch.requests")
+    @patch("api.bag_geosearch.session")
     def test_get_unexpected_stadsdeel(self, mocked_requests):
         mocked_response = Mock()
         mocked_response.json.return_value = {
@@ -54,7 +65,7 @@ class TestBagGeoSearchAPI(TestCase):
         stadsdeel = BagGeoSearchAPI().get_stadsdeel(lat=52.370216, lon=4.895168)
         self.assertEqual(stadsdeel, expected_stadsdeel)
 
-    @patch("api.bag_geosearch.requests")
+    @patch("api.bag_geosearch.session")
     def test_get_stadsdeel_no_response(self, mocked_requests):
         mocked_response = Mock()
         mocked_response.json.return_value = {}
@@ -63,7 +74,7 @@ class TestBagGeoSearchAPI(TestCase):
         stadsdeel = BagGeoSearchAPI().get_stadsdeel(lat=52.370216, lon=4.895168)
         self.assertEqual(stadsdeel, expected_stadsdeel)
 
-    @patch("api.bag_geosearch.requests")
+    @patch("api.bag_geosearch.session")
     def test_get_stadsdeel_json_exception(self, mocked_requests):
         mocked_response = Mock()
         mocked_response.json.side_effect = ValueError()
@@ -72,10 +83,78 @@ class TestBagGeoSearchAPI(TestCase):
         stadsdeel = BagGeoSearchAPI().get_stadsdeel(lat=52.370216, lon=4.895168)
         self.assertEqual(stadsdeel, expected_stadsdeel)
 
-    @patch("api.bag_geosearch.requests")
+    @patch("api.bag_geosearch.session")
     def test_get_stadsdeel_http_exception(self, mocked_requests):
         for ExceptionClass in [ConnectionError, HTTPError, Timeout, TooManyRedirects]:
             mocked_requests.get.side_effect = ExceptionClass()
             expected_stadsdeel = Spot.Stadsdelen.BagFout
             stadsdeel = BagGeoSearchAPI().get_stadsdeel(lat=52.370216, lon=4.895168)
             self.assertEqual(stadsdeel, expected_stadsdeel)
+
+    @patch("api.bag_geosearch.session")
+    def test_get_stadsdeel_cached(self, mocked_requests):
+        mocked_response = Mock()
+        mocked_response.json.return_value = {
+            "features": [{"properties": {"code": "A", "type": "gebieden/stadsdeel"}}],
+        }
+        mocked_requests.get.return_value = mocked_response
+        for _ in range(2):
+            stadsdeel = BagGeoSearchAPI().get_stadsdeel(lat=52.370216, lon=4.895168)
+            self.assertEqual(stadsdeel, Spot.Stadsdelen.Centrum)
+        mocked_requests.get.assert_called_once()
+
+    @patch("api.bag_geosearch.session")
+    def test_get_stadsdeel_error_not_cached(self, mocked_requests):
+        mocked_requests.get.side_effect = ConnectionError()
+        for _ in range(2):
+            stadsdeel = BagGeoSearchAPI().get_stadsdeel(lat=52.370216, lon=4.895168)
+            self.assertEqual(stadsdeel, Spot.Stadsdelen.BagFout)
+        self.assertEqual(mocked_requests.get.call_count, 2)
+
+    @patch("api.bag_geosearch.session")
+    def test_get_stadsdeel_timeout(self, mocked_requests):
+        mocked_requests.get.return_value.json.return_value = {}
+        BagGeoSearchAPI().get_stadsdeel(lat=52.370216, lon=4.895168)
+        self.assertIsNotNone(mocked_requests.get.call_args.kwargs["timeout"])
+
+    @patch("api.bag_geosearch.session")
+    def test_get_stadsdeel_circuit_breaker_open(self, mocked_requests):
+        mocked_requests.get.side_effect = ConnectionError()
+        for _ in range(circuit_breaker.failure_threshold):
+            BagGeoSearchAPI().get_stadsdeel(lat=52.370216, lon=4.895168)
+        mocked_requests.get.reset_mock()
+
+        stadsdeel = BagGeoSearchAPI().get_stadsdeel(lat=52.370216, lon=4.895168)
+        self.assertEqual(stadsdeel, Spot.Stadsdelen.BagFout)
+        mocked_requests.get.assert_not_called()
+
+
+class TestCreateSession(TestCase):
+    def test_read_timeout_not_retried(self):
+        retry = create_session().get_adapter("https://").max_retries
+        self.assertEqual(retry.read, 0)
+        with self.assertRaises(MaxRetryError):
+            retry.increment(
+                method="GET", url="/", error=ReadTimeoutError(None, "/", "")
+            )
+
+
+class TestCircuitBreaker(TestCase):
+    @patch("api.bag_geosearch.time.monotonic")
+    def test_circuit_breaker(self, mocked_monotonic):
+        mocked_monotonic.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        # a single trial call is allowed after the reset timeout
+        mocked_monotonic.return_value = 130
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+
+        breaker.record_success()
+        self.assertFalse(breaker.is_open)
+        self.assertTrue(breaker.allow())
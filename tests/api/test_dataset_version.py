@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from model_bakery import baker
+from rest_framework.reverse import reverse
+
+from api.dataset_version import get_dataset_version
+from datasets.blackspots.models import Document, Spot
+from import_process.management.commands.import_spots import perform_import
+from tests.api.authzsetup import AuthorizationSetup
+
+
+class TestDatasetVersion(TestCase, AuthorizationSetup):
+    def setUp(self):
+        self.setup_clients()
+        cache.clear()
+        self.spot = baker.make(Spot)
+
+    def test_incremented_by_writes(self):
+        version = get_dataset_version()
+
+        baker.make(Document, spot=self.spot)
+        self.assertEqual(get_dataset_version(), version + 1)
+
+        self.spot.delete()
+        # the spot and its document
+        self.assertEqual(get_dataset_version(), version + 3)
+
+    @mock.patch("import_process.management.commands.import_spots.process_xls")
+    def test_incremented_by_import(self, mocked_process_xls):
+        version = get_dataset_version()
+
+        perform_import("/tmp/spots.xls", remove_existing_data=False, bulk=True)
+
+        self.assertEqual(get_dataset_version(), version + 1)
+
+    @mock.patch("import_process.management.commands.import_spots.process_xls")
+    def test_incremented_once_by_import(self, mocked_process_xls):
+        def process_xls(*args, **kwargs):
+            # like the import without --bulk, which saves every spot
+            baker.make(Spot, _quantity=3)
+
+        mocked_process_xls.side_effect = process_xls
+        version = get_dataset_version()
+
+        perform_import("/tmp/spots.xls", remove_existing_data=False)
+
+        self.assertEqual(get_dataset_version(), version + 1)
+
+    @mock.patch("import_process.management.commands.import_spots.process_xls")
+    def test_not_incremented_by_unchanged_import(self, mocked_process_xls):
+        mocked_process_xls.return_value = {
+            "inserted": 0,
+            "updated": 0,
+            "unchanged": 1,
+            "deleted": 0,
+        }
+        version = get_dataset_version()
+
+        perform_import("/tmp/spots.xls", remove_existing_data=False, incremental=True)
+
+        self.assertEqual(get_dataset_version(), version)
+
+    def assertNotModified(self, url):
+        response = self.read_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        # only the dataset version is queried
+        with self.assertNumQueries(1):
+            response = self.read_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        return etag
+
+    def test_spot_list_not_modified(self):
+        self.assertNotModified(reverse("spot-list"))
+
+    def test_spot_list_geojson_not_modified(self):
+        etag = self.assertNotModified(reverse("spot-list", format="geojson"))
+        self.assertNotEqual(etag, self.read_client.get(reverse("spot-list"))["ETag"])
+
+    def test_spot_detail_not_modified(self):
+        self.assertNotModified(reverse("spot-detail", [self.spot.id]))
+
+    def test_spot_export_not_modified(self):
+        self.assertNotModified("/spots/export/")
+
+    def test_etag_changed_by_writes(self):
+        url = reverse("spot-list")
+        etag = self.read_client.get(url)["ETag"]
+
+        baker.make(Spot)
+        response = self.read_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
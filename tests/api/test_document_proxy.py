@@ -1,13 +1,15 @@
 import logging
+import tempfile
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from model_bakery import baker
 from rest_framework.reverse import reverse
 from swiftclient import ClientException
 
 from datasets.blackspots import models
 from datasets.blackspots.models import Document
+from storage.connection_pool import clear_connection_pools
 from tests.api.authzsetup import AuthorizationSetup
 
 log = logging.getLogger(__name__)
@@ -20,6 +22,13 @@ class TestDocumentProxy(TestCase, AuthorizationSetup):
 
     def setUp(self):
         self.setup_clients()
+        clear_connection_pools()
+
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        cache_settings = override_settings(DOCUMENT_CACHE_DIR=cache_dir.name)
+        cache_settings.enable()
+        self.addCleanup(cache_settings.disable)
 
         self.document = baker.make(Document, type="Ontwerp", filename="foo.pdf")
 
@@ -31,17 +40,184 @@ class TestDocumentProxy(TestCase, AuthorizationSetup):
     @patch("storage.object_store.ObjectStore.get_document")
     def test_get_document(self, get_mock, connection_mock):
         connection_mock.return_value = "connection_object"
-        get_mock.return_value = [{"content-type": "application/pdf"}, "blob"]
+        get_mock.return_value = [
+            {"content-type": "application/pdf"},
+            iter([b"bl", b"ob"]),
+        ]
 
         response = self.read_client.get(
             reverse("document-get-file", [self.document.id])
         )
 
         # note, container name test is defined in the environment OBJECTSTORE_UPLOAD_CONTAINER_NAME
-        get_mock.assert_called_with("connection_object", "test/doc/ontwerp", "foo.pdf")
+        get_mock.assert_called_with(
+            "connection_object", "test/doc/ontwerp", "foo.pdf", headers={}
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("application/pdf", response["Content-Type"])
+        self.assertTrue(response.streaming)
+        self.assertEqual(b"".join(response.streaming_content), b"blob")
+
+    @patch("storage.object_store.ObjectStore.get_connection")
+    @patch("storage.object_store.ObjectStore.get_document")
+    def test_get_document_headers(self, get_mock, connection_mock):
+        connection_mock.return_value = "connection_object"
+        get_mock.return_value = [
+            {
+                "content-type": "application/pdf",
+                "content-length": "4",
+                "etag": "ee26908bf9629eeb4b37dac350f4754a",
+                "last-modified": "Mon, 26 Aug 2019 09:08:55 GMT",
+                "x-timestamp": "1566810535.15081",
+            },
+            iter([b"blob"]),
+        ]
+
+        response = self.read_client.get(
+            reverse("document-get-file", [self.document.id])
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("4", response["Content-Length"])
+        self.assertEqual('"ee26908bf9629eeb4b37dac350f4754a"', response["ETag"])
+        self.assertEqual("Mon, 26 Aug 2019 09:08:55 GMT", response["Last-Modified"])
+        self.assertFalse(response.has_header("x-timestamp"))
+
+    @patch("storage.object_store.ObjectStore.get_connection")
+    @patch("storage.object_store.ObjectStore.get_document")
+    def test_get_document_range(self, get_mock, connection_mock):
+        connection_mock.return_value = "connection_object"
+        get_mock.return_value = [
+            {
+                "content-type": "application/pdf",
+                "content-length": "2",
+                "content-range": "bytes 0-1/4",
+            },
+            iter([b"bl"]),
+        ]
+
+        response = self.read_client.get(
+            reverse("document-get-file", [self.document.id]),
+            HTTP_RANGE="bytes=0-1",
+            HTTP_IF_MODIFIED_SINCE="Mon, 26 Aug 2019 09:08:55 GMT",
+        )
+
+        get_mock.assert_called_with(
+            "connection_object",
+            "test/doc/ontwerp",
+            "foo.pdf",
+            headers={
+                "Range": "bytes=0-1",
+                "If-Modified-Since": "Mon, 26 Aug 2019 09:08:55 GMT",
+            },
+        )
+        self.assertEqual(206, response.status_code)
+        self.assertEqual("bytes 0-1/4", response["Content-Range"])
+        self.assertEqual(b"".join(response.streaming_content), b"bl")
+
+    @patch("storage.object_store.ObjectStore.get_connection")
+    @patch("storage.object_store.ObjectStore.get_document")
+    def test_get_document_not_modified(self, get_mock, connection_mock):
+        connection_mock.return_value = "connection_object"
+        get_mock.side_effect = ClientException(
+            "Object GET failed",
+            http_status=304,
+            http_response_headers={"etag": "ee26908bf9629eeb4b37dac350f4754a"},
+        )
+
+        response = self.read_client.get(
+            reverse("document-get-file", [self.document.id]),
+            HTTP_IF_NONE_MATCH='"ee26908bf9629eeb4b37dac350f4754a"',
+        )
+
+        get_mock.assert_called_with(
+            "connection_object",
+            "test/doc/ontwerp",
+            "foo.pdf",
+            headers={"If-None-Match": '"ee26908bf9629eeb4b37dac350f4754a"'},
+        )
+        self.assertEqual(304, response.status_code)
+        self.assertEqual('"ee26908bf9629eeb4b37dac350f4754a"', response["ETag"])
+
+    @patch("storage.object_store.ObjectStore.get_connection")
+    @patch("storage.object_store.ObjectStore.get_document")
+    def test_get_cached_document(self, get_mock, connection_mock):
+        connection_mock.return_value = "connection_object"
+        get_mock.return_value = [
+            {"content-type": "application/pdf", "etag": "etag1"},
+            iter([b"blob"]),
+        ]
+        url = reverse("document-get-file", [self.document.id])
+
+        response = self.read_client.get(url)
+        self.assertEqual(b"".join(response.streaming_content), b"blob")
+        get_mock.reset_mock()
+
+        response = self.read_client.get(url)
+        get_mock.assert_not_called()
         self.assertEqual(200, response.status_code)
         self.assertEqual("application/pdf", response["Content-Type"])
-        self.assertEqual(response.content, b"blob")
+        self.assertEqual('"etag1"', response["ETag"])
+        self.assertEqual(b"".join(response.streaming_content), b"blob")
+
+        response = self.read_client.get(url, HTTP_IF_NONE_MATCH='"etag1"')
+        get_mock.assert_not_called()
+        self.assertEqual(304, response.status_code)
+
+    @override_settings(DOCUMENT_CACHE_MAX_AGE=0)
+    @patch("storage.object_store.ObjectStore.get_etag")
+    @patch("storage.object_store.ObjectStore.get_connection")
+    @patch("storage.object_store.ObjectStore.get_document")
+    def test_revalidate_cached_document(self, get_mock, connection_mock, etag_mock):
+        connection_mock.return_value = "connection_object"
+        get_mock.return_value = [
+            {"content-type": "application/pdf", "etag": "etag1"},
+            iter([b"blob"]),
+        ]
+        url = reverse("document-get-file", [self.document.id])
+        b"".join(self.read_client.get(url).streaming_content)
+        get_mock.reset_mock()
+
+        etag_mock.return_value = "etag1"
+        response = self.read_client.get(url)
+        etag_mock.assert_called_with("connection_object", "test/doc/ontwerp", "foo.pdf")
+        get_mock.assert_not_called()
+        self.assertEqual(b"".join(response.streaming_content), b"blob")
+
+        # replaced on the object store
+        etag_mock.return_value = "etag2"
+        get_mock.return_value = [
+            {"content-type": "application/pdf", "etag": "etag2"},
+            iter([b"new blob"]),
+        ]
+        response = self.read_client.get(url)
+        get_mock.assert_called_once()
+        self.assertEqual(b"".join(response.streaming_content), b"new blob")
+
+    @patch("storage.object_store.ObjectStore.release_connection")
+    @patch("storage.object_store.ObjectStore.get_connection")
+    @patch("storage.object_store.ObjectStore.get_document")
+    def test_connection_released(self, get_mock, connection_mock, release_mock):
+        connection_mock.return_value = "connection_object"
+        url = reverse("document-get-file", [self.document.id])
+
+        get_mock.return_value = [{"content-type": "application/pdf"}, iter([b"blob"])]
+        response = self.read_client.get(url)
+        self.assertEqual(b"".join(response.streaming_content), b"blob")
+        response.close()
+        release_mock.assert_called_once_with("connection_object")
+
+        # the body is not read, like for a HEAD request
+        release_mock.reset_mock()
+        get_mock.return_value = [{"content-type": "application/pdf"}, iter([b"blob"])]
+        self.read_client.get(url).close()
+        release_mock.assert_called_once_with("connection_object")
+
+        release_mock.reset_mock()
+        get_mock.side_effect = OSError("Connection reset")
+        with self.assertRaises(OSError):
+            self.read_client.get(url)
+        release_mock.assert_called_once_with("connection_object")
 
     @patch("storage.object_store.ObjectStore.get_connection")
     @patch("storage.object_store.ObjectStore.get_document")
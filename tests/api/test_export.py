@@ -0,0 +1,57 @@
+from unittest import TestCase as SimpleTestCase
+
+from django.contrib.gis.geos import Point
+from django.test import TestCase
+from model_bakery import baker
+
+from api.export import EXPORT_COLUMNS, render_spot_export
+from api.renderers import StreamingCSVRenderer
+from api.serializers import SpotCSVSerializer
+from datasets.blackspots.models import Spot
+from tests.api.authzsetup import AuthorizationSetup
+
+
+class TestExportColumns(SimpleTestCase):
+    def test_columns(self):
+        self.assertEqual(
+            [column for column, _source in EXPORT_COLUMNS],
+            SpotCSVSerializer.Meta.fields,
+        )
+
+
+class TestSpotExport(TestCase, AuthorizationSetup):
+    def setUp(self):
+        self.setup_clients()
+        baker.make(
+            Spot,
+            stadsdeel=Spot.Stadsdelen.Nieuw_West,
+            status=Spot.StatusChoice.onderzoek_ontwerp,
+            point=Point(4.8012345678, 52.3612345678, srid=4326),
+            notes="notes; with a delimiter",
+            jaar_oplevering=2020,
+        )
+        baker.make(
+            Spot,
+            stadsdeel=Spot.Stadsdelen.Centrum,
+            status=Spot.StatusChoice.gereed,
+            point=None,
+            tasks=None,
+        )
+
+    def test_render_spot_export(self):
+        queryset = Spot.objects.order_by("pk")
+        serializer = SpotCSVSerializer(queryset, many=True)
+        expected = StreamingCSVRenderer().render(
+            serializer.data, SpotCSVSerializer.Meta.fields
+        )
+
+        self.assertEqual(list(render_spot_export(queryset)), list(expected))
+
+    def test_export_endpoint(self):
+        response = self.read_client.get("/spots/export/?status=gereed")
+
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], ";".join(SpotCSVSerializer.Meta.fields))
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith("Centrum;"))
@@ -0,0 +1,86 @@
+import json
+from unittest import TestCase as SimpleTestCase
+
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.exceptions import ValidationError
+from rest_framework.reverse import reverse
+
+from api.fieldsets import get_fieldset, get_only_fields
+from datasets.blackspots.models import Document, Spot
+from tests.api.authzsetup import AuthorizationSetup
+
+
+class TestFieldset(SimpleTestCase):
+    available = ["id", "status", "documents", "notes"]
+
+    def test_get_fieldset(self):
+        for query, expected in [
+            ("", None),
+            ("fields=status,notes", {"status", "notes"}),
+            ("exclude=documents", {"id", "status", "notes"}),
+            ("fields=status,notes&exclude=notes", {"status"}),
+        ]:
+            self.assertEqual(
+                get_fieldset(QueryDict(query), self.available), expected, query
+            )
+
+    def test_get_fieldset_unknown_field(self):
+        with self.assertRaises(ValidationError):
+            get_fieldset(QueryDict("fields=status,secret"), self.available)
+
+    def test_get_only_fields(self):
+        self.assertEqual(
+            get_only_fields(Spot, {"status", "documents", "_links"}, ["point"]),
+            ["id", "point", "status"],
+        )
+
+
+@override_settings(SPOT_RESPONSE_CACHE_TTL=0)
+class TestSparseFieldsets(TestCase, AuthorizationSetup):
+    def setUp(self):
+        self.setup_clients()
+        baker.make(Document, spot=baker.make(Spot, notes="notes"))
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.read_client.get(url, params)
+            content = (
+                b"".join(response.streaming_content)
+                if response.streaming
+                else response.content
+            )
+        self.assertEqual(response.status_code, 200, content)
+        sql = " ".join(query["sql"] for query in context.captured_queries)
+        return json.loads(content), sql
+
+    def test_spot_list(self):
+        data, sql = self.get(reverse("spot-list"), {"fields": "spot_type,status"})
+
+        self.assertEqual(set(data["results"][0]), {"id", "spot_type", "status"})
+        self.assertNotIn(Document._meta.db_table, sql)
+        self.assertNotIn('"notes"', sql)
+
+    def test_spot_list_exclude(self):
+        data, sql = self.get(reverse("spot-list"), {"exclude": "notes,tasks"})
+
+        spot = data["results"][0]
+        self.assertNotIn("notes", spot)
+        self.assertEqual(len(spot["documents"]), 1)
+        self.assertIn(Document._meta.db_table, sql)
+
+    def test_spot_list_geojson(self):
+        data, sql = self.get(
+            reverse("spot-list", format="geojson"), {"fields": "status,documents"}
+        )
+
+        feature = data["features"][0]
+        self.assertEqual(set(feature["properties"]), {"status", "documents"})
+        self.assertIn("geometry", feature)
+
+    def test_unknown_field(self):
+        response = self.read_client.get(reverse("spot-list"), {"fields": "secret"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,113 @@
+import json
+import tempfile
+from unittest import TestCase as SimpleTestCase
+
+from django.contrib.gis.geos import LineString, Point, Polygon
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from model_bakery import baker
+from rest_framework.exceptions import ValidationError
+from rest_framework.reverse import reverse
+
+from api.filters import SpotFilter
+from datasets.blackspots.models import Spot
+from tests.api.authzsetup import AuthorizationSetup
+
+
+class TestSpotFilter(TestCase, AuthorizationSetup):
+    def setUp(self):
+        self.setup_clients()
+        cache.clear()
+
+        self.centrum_point = baker.make(
+            Spot,
+            locatie_id="centrum_point",
+            stadsdeel=Spot.Stadsdelen.Centrum,
+            point=Point(4.8950, 52.3700, srid=4326),
+        )
+        self.centrum_polygon = baker.make(
+            Spot,
+            locatie_id="centrum_polygon",
+            stadsdeel=Spot.Stadsdelen.Centrum,
+            point=None,
+            polygoon=Polygon.from_bbox((4.8960, 52.3710, 4.8970, 52.3720)),
+        )
+        self.noord_wegvak = baker.make(
+            Spot,
+            locatie_id="noord_wegvak",
+            stadsdeel=Spot.Stadsdelen.Noord,
+            point=None,
+            wegvak=LineString((4.9200, 52.4000), (4.9300, 52.4000), srid=4326),
+        )
+
+    def get_locatie_ids(self, params):
+        response = self.read_client.get(reverse("spot-list"), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return {spot["locatie_id"] for spot in response.data["results"]}
+
+    def test_stadsdeel(self):
+        self.assertEqual(
+            self.get_locatie_ids({"stadsdeel": "A"}),
+            {"centrum_point", "centrum_polygon"},
+        )
+        self.assertEqual(
+            self.get_locatie_ids({"stadsdeel": "N", "bbox": "4.89,52.36,4.94,52.41"}),
+            {"noord_wegvak"},
+        )
+
+    @override_settings(SPOT_SNAPSHOT_DIR=tempfile.mkdtemp())
+    def test_stadsdeel_geojson(self):
+        # with and without a snapshot
+        for params in [{"stadsdeel": "A"}, {"stadsdeel": "A", "zoom": 10}]:
+            response = self.read_client.get(
+                reverse("spot-list", format="geojson"), params
+            )
+            self.assertEqual(response.status_code, 200)
+            content = b"".join(response.streaming_content)
+            self.assertEqual(len(json.loads(content)["features"]), 2, params)
+
+    def test_bbox(self):
+        self.assertEqual(
+            self.get_locatie_ids({"bbox": "4.89,52.36,4.90,52.38"}),
+            {"centrum_point", "centrum_polygon"},
+        )
+        self.assertEqual(
+            self.get_locatie_ids({"bbox": "4.925,52.39,4.94,52.41"}), {"noord_wegvak"}
+        )
+
+    def test_near(self):
+        self.assertEqual(
+            self.get_locatie_ids({"near": "4.8950,52.3700", "radius": 50}),
+            {"centrum_point"},
+        )
+        self.assertEqual(
+            self.get_locatie_ids({"near": "4.8950,52.3700", "radius": 500}),
+            {"centrum_point", "centrum_polygon"},
+        )
+
+    def test_within(self):
+        self.assertEqual(
+            self.get_locatie_ids(
+                {"within": Polygon.from_bbox((4.91, 52.39, 4.95, 52.41)).wkt}
+            ),
+            {"noord_wegvak"},
+        )
+
+    def test_invalid_parameters(self):
+        for params in [
+            {"bbox": "4.89,52.36"},
+            {"bbox": "a,b,c,d"},
+            {"near": "4.8950,52.3700"},
+            {"within": "not a geometry"},
+            {"within": '{"foo": 1}'},
+            {"within": '{"type": "Polygon"}'},
+        ]:
+            response = self.read_client.get(reverse("spot-list"), params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class TestFilterWithin(SimpleTestCase):
+    def test_malformed_geojson(self):
+        for value in ['{"foo": 1}', '{"type": "Point"}', "not a geometry"]:
+            with self.assertRaises(ValidationError, msg=value):
+                SpotFilter().filter_within(Spot.objects.none(), "within", value)
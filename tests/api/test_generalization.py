@@ -0,0 +1,94 @@
+import json
+import math
+from unittest import TestCase as SimpleTestCase
+
+from django.contrib.gis.geos import LineString, Point
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import TestCase
+from model_bakery import baker
+from rest_framework.exceptions import ValidationError
+from rest_framework.reverse import reverse
+
+from api.generalization import get_resolution, round_coordinates
+from datasets.blackspots.models import GeneralizedGeometry, Spot
+from tests.api.authzsetup import AuthorizationSetup
+
+
+class TestResolution(SimpleTestCase):
+    def test_get_resolution(self):
+        for query, expected in [
+            ("", None),
+            ("resolution=low", "low"),
+            ("resolution=full", None),
+            ("resolution=medium&zoom=10", "medium"),
+            ("zoom=8", "low"),
+            ("zoom=14", "medium"),
+            ("zoom=16", "high"),
+            ("zoom=19", None),
+        ]:
+            self.assertEqual(get_resolution(QueryDict(query)), expected, query)
+
+    def test_get_resolution_invalid(self):
+        for query in ["resolution=lowest", "zoom=-1", "zoom=high"]:
+            with self.assertRaises(ValidationError):
+                get_resolution(QueryDict(query))
+
+    def test_round_coordinates(self):
+        self.assertEqual(
+            round_coordinates([[4.123456, 52.654321], [4.1, 52.6]], 4),
+            [[4.1235, 52.6543], [4.1, 52.6]],
+        )
+
+
+class TestGeneralizedGeometries(TestCase, AuthorizationSetup):
+    def setUp(self):
+        self.setup_clients()
+        cache.clear()
+        # a wiggly line of 201 vertices, a few meters apart
+        self.spot = baker.make(
+            Spot,
+            point=Point(4.9, 52.37, srid=4326),
+            wegvak=LineString(
+                [
+                    (4.9 + i * 0.00005, 52.37 + math.sin(i) * 0.000005)
+                    for i in range(201)
+                ],
+                srid=4326,
+            ),
+        )
+
+    def test_refreshed_on_save(self):
+        generalized = GeneralizedGeometry.objects.filter(spot=self.spot)
+        self.assertEqual(
+            {geometry.resolution for geometry in generalized}, {"low", "medium", "high"}
+        )
+        self.assertLess(
+            len(generalized.get(resolution="low").wegvak), len(self.spot.wegvak)
+        )
+
+        self.spot.wegvak = LineString((4.9, 52.37), (4.91, 52.37), srid=4326)
+        self.spot.save()
+        self.assertEqual(len(generalized.get(resolution="low").wegvak), 2)
+
+    def test_spot_list(self):
+        url = reverse("spot-list")
+        full = self.read_client.get(url).data["results"][0]
+        low = self.read_client.get(url, {"zoom": 10}).data["results"][0]
+
+        self.assertEqual(len(full["wegvak"]["coordinates"]), 201)
+        self.assertLess(len(low["wegvak"]["coordinates"]), 201)
+        for lon, lat in low["wegvak"]["coordinates"]:
+            self.assertEqual((lon, lat), (round(lon, 4), round(lat, 4)))
+
+    def test_spot_list_geojson(self):
+        url = reverse("spot-list", format="geojson")
+        response = self.read_client.get(url, {"resolution": "low"})
+        feature = json.loads(b"".join(response.streaming_content))["features"][0]
+
+        self.assertLess(len(feature["properties"]["wegvak"]["coordinates"]), 201)
+        self.assertEqual(feature["geometry"]["coordinates"], [4.9, 52.37])
+
+    def test_invalid_resolution(self):
+        response = self.read_client.get(reverse("spot-list"), {"resolution": "tiny"})
+        self.assertEqual(response.status_code, 400)
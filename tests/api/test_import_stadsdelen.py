@@ -0,0 +1,57 @@
+import json
+import tempfile
+
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from django.core.management import call_command
+from django.test import TestCase
+from model_bakery import baker
+
+from datasets.blackspots.models import Spot, Stadsdeel
+
+
+def get_feature(code: str) -> dict:
+    return {
+        "type": "Feature",
+        "properties": {"code": code, "naam": code},
+        "geometry": json.loads(Polygon.from_bbox((4.89, 52.36, 4.91, 52.38)).json),
+    }
+
+
+class TestImportStadsdelen(TestCase):
+    def import_features(self, features):
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as file:
+            json.dump({"type": "FeatureCollection", "features": features}, file)
+            file.flush()
+            call_command("import_stadsdelen", geojson_path=file.name)
+
+    def test_unexpected_features_skipped(self):
+        """
+        Test and assert that features with an unknown code or without a geometry are
+        skipped, and the other stadsdelen are imported
+        """
+        self.import_features(
+            [get_feature("A"), get_feature("X"), {"properties": {"code": "N"}}]
+        )
+
+        self.assertEqual(
+            list(Stadsdeel.objects.values_list("code", flat=True)),
+            [Spot.Stadsdelen.Centrum],
+        )
+
+    def test_previous_boundaries_kept(self):
+        """
+        Test and assert that the boundaries are not removed when no stadsdeel could be
+        imported
+        """
+        baker.make(
+            Stadsdeel,
+            code=Spot.Stadsdelen.Noord,
+            geometrie=MultiPolygon(Polygon.from_bbox((4.9, 52.4, 4.95, 52.42))),
+        )
+
+        self.import_features([get_feature("X")])
+
+        self.assertEqual(
+            list(Stadsdeel.objects.values_list("code", flat=True)),
+            [Spot.Stadsdelen.Noord],
+        )
@@ -0,0 +1,147 @@
+from unittest import TestCase as SimpleTestCase
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.exceptions import NotFound
+from rest_framework.reverse import reverse
+
+from api.pagination import (
+    coerce_cursor,
+    decode_cursor,
+    encode_cursor,
+    get_estimated_count,
+)
+from datasets.blackspots.models import Document, Spot
+from tests.api.authzsetup import AuthorizationSetup
+
+
+class TestCursor(SimpleTestCase):
+    def test_encode_decode(self):
+        cursor = encode_cursor(["A", "blackspot", 12])
+        self.assertEqual(decode_cursor(cursor, 3), ["A", "blackspot", 12])
+
+    def test_decode_invalid(self):
+        for cursor in ["not a cursor", encode_cursor(["A"]), encode_cursor({"a": 1})]:
+            with self.assertRaises(NotFound):
+                decode_cursor(cursor, 3)
+
+    def test_coerce(self):
+        fields = [Spot._meta.get_field("stadsdeel"), Spot._meta.pk]
+        self.assertEqual(coerce_cursor(["A", "12"], fields), ["A", 12])
+
+    def test_coerce_invalid(self):
+        for values in [["abc"], [[1]], [{"a": 1}]]:
+            with self.assertRaises(NotFound, msg=values):
+                coerce_cursor(values, [Spot._meta.pk])
+
+
+@override_settings(SPOT_RESPONSE_CACHE_TTL=0)
+class TestCursorPagination(TestCase, AuthorizationSetup):
+    def setUp(self):
+        self.setup_clients()
+        for stadsdeel in ["N", "A", "N", "T", "A"]:
+            baker.make(Document, spot=baker.make(Spot, stadsdeel=stadsdeel))
+
+    def get_all_pages(self, url, params):
+        ids, page_count = [], 0
+        response = self.read_client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            ids += [item["id"] for item in response.data["results"]]
+            page_count += 1
+            next_link = response.data["_links"]["next"]["href"]
+            if next_link is None:
+                return ids, page_count
+            response = self.read_client.get(next_link)
+
+    def test_spot_list(self):
+        ids, page_count = self.get_all_pages(
+            reverse("spot-list"), {"pagination": "cursor", "page_size": 2}
+        )
+
+        self.assertEqual(
+            ids, list(Spot.objects.order_by("pk").values_list("id", flat=True))
+        )
+        self.assertEqual(page_count, 3)
+
+    def test_spot_list_export_ordering(self):
+        ids, _ = self.get_all_pages(
+            reverse("spot-list"),
+            {"pagination": "cursor", "page_size": 2, "ordering": "export"},
+        )
+
+        expected = Spot.objects.order_by("stadsdeel", "spot_type", "pk")
+        self.assertEqual(ids, list(expected.values_list("id", flat=True)))
+
+    def test_document_list(self):
+        ids, _ = self.get_all_pages(
+            reverse("document-list"), {"pagination": "cursor", "page_size": 3}
+        )
+
+        self.assertEqual(
+            ids, list(Document.objects.order_by("pk").values_list("id", flat=True))
+        )
+
+    def test_no_count(self):
+        with CaptureQueriesContext(connection) as context:
+            self.read_client.get(reverse("spot-list"), {"pagination": "cursor"})
+
+        for query in context.captured_queries:
+            self.assertNotIn("COUNT(", query["sql"].upper())
+
+    def test_invalid_parameters(self):
+        url = reverse("spot-list")
+        for cursor in ["x", encode_cursor(["abc"])]:
+            response = self.read_client.get(
+                url, {"pagination": "cursor", "cursor": cursor}
+            )
+            self.assertEqual(response.status_code, 404, cursor)
+
+        response = self.read_client.get(
+            url, {"pagination": "cursor", "ordering": "status"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(SPOT_RESPONSE_CACHE_TTL=0)
+class TestCachedCount(TestCase, AuthorizationSetup):
+    def setUp(self):
+        self.setup_clients()
+        cache.clear()
+        baker.make(Spot, stadsdeel="A", _quantity=3)
+
+    def get_count(self, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.read_client.get(reverse("spot-list"), params)
+        self.assertEqual(response.status_code, 200)
+        count_queries = [
+            query for query in context.captured_queries if "COUNT(" in query["sql"]
+        ]
+        return response.data["count"], len(count_queries)
+
+    def test_cached_count(self):
+        self.assertEqual(self.get_count({"page_size": 2}), (3, 1))
+        # the same filters on another page
+        self.assertEqual(self.get_count({"page_size": 2, "page": 2}), (3, 0))
+        self.assertEqual(self.get_count({"stadsdeel": "N"}), (0, 1))
+
+        # a new dataset version
+        baker.make(Spot, stadsdeel="A")
+        self.assertEqual(self.get_count({"page_size": 2}), (4, 1))
+
+    @override_settings(PAGINATION_COUNT_ESTIMATE_THRESHOLD=1)
+    def test_estimated_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Spot._meta.db_table}")
+
+        self.assertEqual(get_estimated_count(Spot.objects.all()), 3)
+        self.assertIsNone(get_estimated_count(Spot.objects.filter(stadsdeel="A")))
+        self.assertEqual(self.get_count({}), (3, 0))
+
+    @override_settings(PAGINATION_COUNT_ESTIMATE_THRESHOLD=1000)
+    def test_estimated_count_small_table(self):
+        self.assertIsNone(get_estimated_count(Spot.objects.all()))
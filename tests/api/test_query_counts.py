@@ -0,0 +1,50 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.reverse import reverse
+
+from datasets.blackspots.models import Document, Spot
+from tests.api.authzsetup import AuthorizationSetup
+
+
+@override_settings(SPOT_RESPONSE_CACHE_TTL=0, PAGINATION_COUNT_CACHE_TTL=0)
+class TestQueryCounts(TestCase, AuthorizationSetup):
+    """
+    Verifies that the number of queries of the list endpoints does not grow with
+    the number of spots and documents.
+    """
+
+    def setUp(self):
+        self.setup_clients()
+
+    def make_spots(self, quantity):
+        for spot in baker.make(Spot, _quantity=quantity):
+            baker.make(Document, spot=spot, _quantity=2)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.read_client.get(url)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, url):
+        self.make_spots(2)
+        query_count = self.count_queries(url)
+
+        self.make_spots(5)
+        self.assertEqual(self.count_queries(url), query_count, url)
+
+    def test_spot_list(self):
+        self.assertConstantQueries(reverse("spot-list"))
+
+    def test_spot_list_geojson(self):
+        self.assertConstantQueries(reverse("spot-list", format="geojson"))
+
+    def test_spot_export(self):
+        self.assertConstantQueries("/spots/export/")
+
+    def test_document_list(self):
+        self.assertConstantQueries(reverse("document-list"))
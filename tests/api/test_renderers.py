@@ -33,3 +33,14 @@ class RenderersTestCase(TestCase):
         self.assertEqual(next(generator), "a;b;c;d\r\n")
         with self.assertRaises(StopIteration):
             next(generator)
+
+    def test_streaming_csv_render_rows(self):
+        """
+        Test and assert that rows of values are rendered like the dicts
+        """
+        renderer = StreamingCSVRenderer()
+        rows = [[row[name] for name in self.fieldnames] for row in self.data]
+        self.assertEqual(
+            list(renderer.render_rows(rows, self.fieldnames)),
+            list(renderer.render(self.data, self.fieldnames)),
+        )
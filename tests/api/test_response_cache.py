@@ -0,0 +1,109 @@
+import json
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from rest_framework.reverse import reverse
+
+from api.dataset_version import get_dataset_version
+from datasets.blackspots.models import DatasetVersion, Document, Spot
+from import_process.management.commands.import_spots import perform_import
+from tests.api.authzsetup import AuthorizationSetup
+
+
+class TestResponseCache(TransactionTestCase, AuthorizationSetup):
+    def setUp(self):
+        self.setup_clients()
+        cache.clear()
+        self.spot = baker.make(Spot, point=Point(4.9, 52.37, srid=4326))
+
+    def get_content(self, url, **extra):
+        response = self.read_client.get(url, **extra)
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            return b"".join(response.streaming_content)
+        return response.content
+
+    def test_spot_list_cached(self):
+        url = reverse("spot-list")
+        content = self.get_content(url)
+
+        # only the dataset version of the ETag and the cache key
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_content(url), content)
+
+    def test_spot_list_geojson_cached(self):
+        # filtered, so it is not served from a snapshot
+        url = reverse("spot-list", format="geojson") + "?bbox=-180,-90,180,90"
+        content = self.get_content(url)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_content(url), content)
+        self.assertEqual(len(json.loads(content)["features"]), 1)
+
+    def test_spot_detail_cached(self):
+        url = reverse("spot-detail", [self.spot.id])
+        content = self.get_content(url)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_content(url), content)
+
+    def test_query_parameters_in_key(self):
+        self.get_content(reverse("spot-list"))
+
+        with CaptureQueriesContext(connection) as context:
+            self.get_content(reverse("spot-list") + "?page=1")
+        self.assertTrue(context.captured_queries)
+
+    def test_host_in_key(self):
+        url = reverse("spot-list")
+        content = self.get_content(url, HTTP_HOST="example.com")
+        self.assertIn(b"http://example.com/", content)
+
+        content = self.get_content(url, HTTP_HOST="other.example.com")
+        self.assertIn(b"http://other.example.com/", content)
+        self.assertNotIn(b"http://example.com/", content)
+
+    def test_browsable_api_not_cached(self):
+        url = reverse("spot-list", format="api")
+        self.get_content(url)
+
+        with CaptureQueriesContext(connection) as context:
+            self.get_content(url)
+        self.assertGreater(len(context.captured_queries), 1)
+
+    def test_invalidated_by_other_processes(self):
+        url = reverse("spot-list")
+        self.assertEqual(json.loads(self.get_content(url))["count"], 1)
+
+        # a write of another process, which does not clear the cache of this one
+        Spot.objects.bulk_create([baker.prepare(Spot)])
+        DatasetVersion.objects.update(version=F("version") + 1)
+        self.assertEqual(json.loads(self.get_content(url))["count"], 2)
+
+    def test_invalidated_by_writes(self):
+        url = reverse("spot-list")
+        self.assertEqual(json.loads(self.get_content(url))["count"], 1)
+
+        spot = baker.make(Spot)
+        self.assertEqual(json.loads(self.get_content(url))["count"], 2)
+
+        baker.make(Document, spot=spot)
+        detail_url = reverse("spot-detail", [spot.id])
+        self.assertEqual(len(json.loads(self.get_content(detail_url))["documents"]), 1)
+
+        spot.delete()
+        self.assertEqual(json.loads(self.get_content(url))["count"], 1)
+
+    @mock.patch("import_process.management.commands.import_spots.process_xls")
+    def test_invalidated_by_import(self, mocked_process_xls):
+        version = get_dataset_version()
+
+        perform_import("/tmp/spots.xls", remove_existing_data=False, bulk=True)
+
+        self.assertNotEqual(get_dataset_version(), version)
@@ -0,0 +1,129 @@
+import gzip
+import json
+import os
+import tempfile
+from unittest import TestCase as SimpleTestCase
+
+import brotli
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from model_bakery import baker
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+
+from api.snapshots import SnapshotStore, get_accepted_encoding, get_snapshot_key
+from datasets.blackspots.models import Spot
+from tests.api.authzsetup import AuthorizationSetup
+
+
+class TestSnapshotStore(SimpleTestCase):
+    def setUp(self):
+        self.store = SnapshotStore(tempfile.mkdtemp())
+
+    def test_get(self):
+        build_calls = []
+
+        def build():
+            build_calls.append(1)
+            return [b"snap", b"shot"]
+
+        path = self.store.get(1, "spots.json", build)
+        self.assertEqual(self.store.get(1, "spots.json", build), path)
+
+        self.assertEqual(len(build_calls), 1)
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), b"snapshot")
+        with open(f"{path}.gz", "rb") as file:
+            self.assertEqual(gzip.decompress(file.read()), b"snapshot")
+        with open(f"{path}.br", "rb") as file:
+            self.assertEqual(brotli.decompress(file.read()), b"snapshot")
+
+    def test_other_versions_removed(self):
+        old_path = self.store.get(1, "spots.json", lambda: [b"old"])
+        self.store.get(2, "spots.json", lambda: [b"new"])
+
+        self.assertFalse(os.path.exists(old_path))
+
+
+class TestSnapshotRequests(SimpleTestCase):
+    def get_request(self, path="/", **extra):
+        return Request(RequestFactory().get(path, **extra))
+
+    def test_get_snapshot_key(self):
+        for path, expected in [
+            ("/", "all"),
+            ("/?format=geojson", "all"),
+            ("/?stadsdeel=A", "A"),
+            ("/?stadsdeel=A&format=geojson", "A"),
+            ("/?stadsdeel=Q", None),
+            ("/?stadsdeel=A&stadsdeel=N", None),
+            ("/?stadsdeel=A&status=gereed", None),
+        ]:
+            self.assertEqual(
+                get_snapshot_key(self.get_request(path), ignored_params=["format"]),
+                expected,
+                path,
+            )
+
+    def test_get_accepted_encoding(self):
+        for accept_encoding, expected in [
+            ("", None),
+            ("gzip, deflate, br", "br"),
+            ("gzip", "gzip"),
+            ("br;q=0, gzip;q=0.5", "gzip"),
+            ("identity", None),
+            ("*", "br"),
+        ]:
+            request = self.get_request(HTTP_ACCEPT_ENCODING=accept_encoding)
+            self.assertEqual(get_accepted_encoding(request), expected, accept_encoding)
+
+
+class TestSnapshotResponses(TestCase, AuthorizationSetup):
+    def setUp(self):
+        self.setup_clients()
+        cache.clear()
+        baker.make(Spot, stadsdeel=Spot.Stadsdelen.Centrum, _quantity=2)
+        baker.make(Spot, stadsdeel=Spot.Stadsdelen.Noord)
+        self.override = override_settings(SPOT_SNAPSHOT_DIR=tempfile.mkdtemp())
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+
+    def get(self, url, accept_encoding):
+        response = self.read_client.get(url, HTTP_ACCEPT_ENCODING=accept_encoding)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Accept-Encoding", response["Vary"])
+        return response, b"".join(response.streaming_content)
+
+    def test_spot_list_geojson(self):
+        url = reverse("spot-list", format="geojson")
+        response, content = self.get(url, "gzip, br")
+
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(len(json.loads(brotli.decompress(content))["features"]), 3)
+
+        response, content = self.get(f"{url}?stadsdeel=A", "gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(content))["features"]), 2)
+
+        response, content = self.get(f"{url}?stadsdeel=N", "")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(len(json.loads(content)["features"]), 1)
+
+    def test_etag_per_encoding(self):
+        url = reverse("spot-list", format="geojson")
+        etag = self.get(url, "")[0]["ETag"]
+
+        self.assertFalse(etag.startswith("W/"))
+        self.assertEqual(self.get(url, "br")[0]["ETag"], f"W/{etag}")
+        self.assertEqual(self.get(url, "gzip")[0]["ETag"], f"W/{etag}")
+
+    def test_spot_export(self):
+        response, content = self.get("/spots/export/?stadsdeel=A", "gzip")
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("attachment", response["Content-Disposition"])
+        # header and two spots
+        self.assertEqual(len(gzip.decompress(content).splitlines()), 3)
@@ -293,3 +293,16 @@ class TestSpotSerializers(TestCase):
 
         mocked_get_stadsdeel.assert_called_with(lat=789, lon=123)
         self.assertEqual(result, "test")
+
+    @mock.patch("api.serializers.BagGeoSearchAPI.get_stadsdeel")
+    @mock.patch("api.serializers.get_stadsdeel_resolver")
+    def test_determine_stadsdeel_local(
+        self, mocked_get_stadsdeel_resolver, mocked_get_stadsdeel
+    ):
+        mocked_resolver = mocked_get_stadsdeel_resolver.return_value
+        mocked_resolver.get_stadsdeel.return_value = Spot.Stadsdelen.Centrum
+        result = self.serializer.determine_stadsdeel(Point(x=4.9, y=52.37))
+
+        mocked_resolver.get_stadsdeel.assert_called_with(lat=52.37, lon=4.9)
+        mocked_get_stadsdeel.assert_not_called()
+        self.assertEqual(result, Spot.Stadsdelen.Centrum)
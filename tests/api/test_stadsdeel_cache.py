@@ -0,0 +1,72 @@
+from unittest import TestCase, mock
+
+from django.core.cache import caches
+from django.test import override_settings
+
+from api.stadsdeel_cache import StadsdeelCache
+from datasets.blackspots.models import Spot
+
+
+class TestStadsdeelCache(TestCase):
+    def setUp(self):
+        self.cache = StadsdeelCache(grid_size=0.0001, max_size=2, ttl=60)
+
+    def test_get_snapped(self):
+        self.cache.set(lat=52.370216, lon=4.895168, stadsdeel=Spot.Stadsdelen.Centrum)
+
+        self.assertEqual(
+            self.cache.get(lat=52.370221, lon=4.895171), Spot.Stadsdelen.Centrum
+        )
+        self.assertIsNone(self.cache.get(lat=52.371, lon=4.895168))
+        self.assertEqual(self.cache.stats, {"hits": 1, "misses": 1, "size": 1})
+
+    def test_bagfout_not_cached(self):
+        self.cache.set(lat=52.37, lon=4.89, stadsdeel=Spot.Stadsdelen.BagFout)
+
+        self.assertIsNone(self.cache.get(lat=52.37, lon=4.89))
+        self.assertEqual(self.cache.stats["size"], 0)
+
+    def test_least_recently_used_evicted(self):
+        self.cache.set(lat=52.1, lon=4.1, stadsdeel=Spot.Stadsdelen.Centrum)
+        self.cache.set(lat=52.2, lon=4.2, stadsdeel=Spot.Stadsdelen.Oost)
+        self.cache.get(lat=52.1, lon=4.1)
+        self.cache.set(lat=52.3, lon=4.3, stadsdeel=Spot.Stadsdelen.Zuid)
+
+        self.assertEqual(self.cache.get(lat=52.1, lon=4.1), Spot.Stadsdelen.Centrum)
+        self.assertIsNone(self.cache.get(lat=52.2, lon=4.2))
+        self.assertEqual(self.cache.get(lat=52.3, lon=4.3), Spot.Stadsdelen.Zuid)
+
+    @mock.patch("api.stadsdeel_cache.time.monotonic")
+    def test_expired(self, mocked_monotonic):
+        mocked_monotonic.return_value = 100
+        self.cache.set(lat=52.37, lon=4.89, stadsdeel=Spot.Stadsdelen.Centrum)
+
+        mocked_monotonic.return_value = 161
+        self.assertIsNone(self.cache.get(lat=52.37, lon=4.89))
+        self.assertEqual(self.cache.stats["size"], 0)
+
+    def test_disabled(self):
+        cache = StadsdeelCache(grid_size=0.0001, max_size=0, ttl=60)
+        cache.set(lat=52.37, lon=4.89, stadsdeel=Spot.Stadsdelen.Centrum)
+
+        self.assertIsNone(cache.get(lat=52.37, lon=4.89))
+
+    @override_settings(
+        CACHES={
+            "stadsdeel": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "test-stadsdeel",
+            }
+        }
+    )
+    def test_shared_backend(self):
+        StadsdeelCache(grid_size=0.0001, max_size=2, ttl=60, backend="stadsdeel").set(
+            lat=52.37, lon=4.89, stadsdeel=Spot.Stadsdelen.Centrum
+        )
+        cache = StadsdeelCache(
+            grid_size=0.0001, max_size=2, ttl=60, backend="stadsdeel"
+        )
+
+        self.assertEqual(cache.get(lat=52.37, lon=4.89), Spot.Stadsdelen.Centrum)
+        self.assertEqual(cache.stats, {"hits": 1, "misses": 0, "size": 1})
+        caches["stadsdeel"].clear()
@@ -0,0 +1,71 @@
+from unittest import TestCase, mock
+
+from django.contrib.gis.geos import Polygon
+from django.test import override_settings
+
+from api.stadsdeel_resolver import StadsdeelResolver
+from datasets.blackspots.models import Spot
+
+
+def get_boundary(xmin, ymin, xmax, ymax, code):
+    polygon = Polygon.from_bbox((xmin, ymin, xmax, ymax))
+    polygon.srid = 4326
+    return polygon.extent, polygon.prepared, code
+
+
+class TestStadsdeelResolver(TestCase):
+    def setUp(self):
+        self.resolver = StadsdeelResolver(
+            boundaries=[
+                get_boundary(4.8, 52.3, 4.9, 52.4, Spot.Stadsdelen.Centrum),
+                get_boundary(4.9, 52.3, 5.0, 52.4, Spot.Stadsdelen.Oost),
+            ]
+        )
+
+    def test_get_stadsdeel(self):
+        self.assertEqual(
+            self.resolver.get_stadsdeel(lat=52.37, lon=4.85), Spot.Stadsdelen.Centrum
+        )
+        self.assertEqual(
+            self.resolver.get_stadsdeel(lat=52.37, lon=4.95), Spot.Stadsdelen.Oost
+        )
+
+    def test_get_stadsdeel_on_boundary(self):
+        self.assertIn(
+            self.resolver.get_stadsdeel(lat=52.35, lon=4.9),
+            [Spot.Stadsdelen.Centrum, Spot.Stadsdelen.Oost],
+        )
+
+    def test_get_stadsdeel_outside(self):
+        self.assertEqual(
+            self.resolver.get_stadsdeel(lat=51.0, lon=4.85), Spot.Stadsdelen.Geen
+        )
+
+    @mock.patch("api.stadsdeel_resolver.StadsdeelResolver.load_boundaries")
+    def test_get_stadsdeel_without_boundaries(self, load_boundaries):
+        load_boundaries.return_value = []
+        self.assertIsNone(StadsdeelResolver().get_stadsdeel(lat=52.37, lon=4.85))
+
+    @mock.patch("api.stadsdeel_resolver.StadsdeelResolver.load_boundaries")
+    def test_get_stadsdeel_load_error(self, load_boundaries):
+        load_boundaries.side_effect = RuntimeError("database unavailable")
+        resolver = StadsdeelResolver()
+        self.assertIsNone(resolver.get_stadsdeel(lat=52.37, lon=4.85))
+
+        # a failed load is retried on the next lookup
+        load_boundaries.side_effect = None
+        load_boundaries.return_value = [
+            get_boundary(4.8, 52.3, 4.9, 52.4, Spot.Stadsdelen.Centrum)
+        ]
+        self.assertEqual(
+            resolver.get_stadsdeel(lat=52.37, lon=4.85), Spot.Stadsdelen.Centrum
+        )
+
+    @override_settings(STADSDEEL_BOUNDARIES_TTL=0)
+    @mock.patch("api.stadsdeel_resolver.StadsdeelResolver.load_boundaries")
+    def test_get_stadsdeel_reload(self, load_boundaries):
+        load_boundaries.return_value = [
+            get_boundary(4.8, 52.3, 4.9, 52.4, Spot.Stadsdelen.Centrum)
+        ]
+        self.resolver.get_stadsdeel(lat=52.37, lon=4.85)
+        load_boundaries.assert_called_once()
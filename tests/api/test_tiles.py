@@ -0,0 +1,60 @@
+from unittest import TestCase as SimpleTestCase
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.test import TestCase
+from model_bakery import baker
+from rest_framework.reverse import reverse
+
+from api.tiles import get_tile_envelope, is_valid_tile
+from datasets.blackspots.models import Spot
+from tests.api.authzsetup import AuthorizationSetup
+
+
+class TestTileEnvelope(SimpleTestCase):
+    def test_get_tile_envelope(self):
+        extent = 20037508.342789244
+        self.assertEqual(get_tile_envelope(0, 0, 0), (-extent, -extent, extent, extent))
+        self.assertEqual(get_tile_envelope(1, 1, 0), (0, 0, extent, extent))
+        self.assertEqual(get_tile_envelope(1, 0, 1), (-extent, -extent, 0, 0))
+
+    def test_is_valid_tile(self):
+        self.assertTrue(is_valid_tile(0, 0, 0))
+        self.assertTrue(is_valid_tile(14, 8414, 5384))
+        self.assertFalse(is_valid_tile(1, 2, 0))
+        self.assertFalse(is_valid_tile(23, 0, 0))
+
+
+class TestSpotTileView(TestCase, AuthorizationSetup):
+    def setUp(self):
+        self.setup_clients()
+        cache.clear()
+
+    def test_spot_tile(self):
+        baker.make(Spot, point=Point(4.8950, 52.3700, srid=4326), polygoon=None)
+        url = reverse("spot-tiles", kwargs={"z": 14, "x": 8414, "y": 5384})
+
+        response = self.read_client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/vnd.mapbox-vector-tile")
+        self.assertIn(b"spots", response.content)
+
+    @mock.patch("api.views.get_spot_tile")
+    def test_spot_tile_cached(self, mocked_get_spot_tile):
+        mocked_get_spot_tile.return_value = b"tile"
+        url = reverse("spot-tiles", kwargs={"z": 1, "x": 0, "y": 0})
+
+        for _ in range(2):
+            response = self.read_client.get(url)
+            self.assertEqual(response.content, b"tile")
+        mocked_get_spot_tile.assert_called_once_with(1, 0, 0)
+        self.assertIn("max-age", response["Cache-Control"])
+
+    def test_spot_tile_out_of_range(self):
+        url = reverse("spot-tiles", kwargs={"z": 1, "x": 2, "y": 0})
+
+        response = self.read_client.get(url)
+
+        self.assertEqual(response.status_code, 404)
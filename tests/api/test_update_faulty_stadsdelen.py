@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.contrib.gis.geos import Point, Polygon
+from django.core.management import call_command
+from django.test import TestCase
+from model_bakery import baker
+
+from api.dataset_version import get_dataset_version
+from datasets.blackspots.models import Spot
+
+
+@mock.patch(
+    "api.management.commands.update_faulty_stadsdelen.get_stadsdeel_resolver",
+    mock.Mock(return_value=mock.Mock(get_stadsdeel=mock.Mock(return_value=None))),
+)
+class TestUpdateFaultyStadsdelen(TestCase):
+    @mock.patch("api.management.commands.update_faulty_stadsdelen.BagGeoSearchAPI")
+    def test_update_faulty_stadsdelen(self, mocked_bag_geosearch_api):
+        """
+        Test and assert that point and polygon-only spots with a faulty stadsdeel
+        are updated, and that other spots are left alone.
+        """
+        mocked_bag_geosearch_api.return_value.get_stadsdeel.return_value = (
+            Spot.Stadsdelen.Centrum
+        )
+        point_spot = baker.make(
+            Spot,
+            stadsdeel=Spot.Stadsdelen.BagFout,
+            point=Point(4.9, 52.37, srid=4326),
+            polygoon=None,
+        )
+        polygon_spot = baker.make(
+            Spot,
+            stadsdeel=Spot.Stadsdelen.BagFout,
+            point=None,
+            polygoon=Polygon.from_bbox((4.89, 52.36, 4.91, 52.38)),
+        )
+        correct_spot = baker.make(
+            Spot, stadsdeel=Spot.Stadsdelen.Oost, point=Point(4.95, 52.36, srid=4326)
+        )
+
+        version = get_dataset_version()
+
+        # the select, and the update with the dataset version in a savepoint
+        with self.assertNumQueries(5):
+            call_command("update_faulty_stadsdelen", workers=2, rate=0)
+
+        self.assertEqual(get_dataset_version(), version + 1)
+
+        self.assertEqual(
+            mocked_bag_geosearch_api.return_value.get_stadsdeel.call_count, 2
+        )
+        for spot in [point_spot, polygon_spot]:
+            spot.refresh_from_db()
+            self.assertEqual(spot.stadsdeel, Spot.Stadsdelen.Centrum)
+        correct_spot.refresh_from_db()
+        self.assertEqual(correct_spot.stadsdeel, Spot.Stadsdelen.Oost)
+
+    @mock.patch("api.management.commands.update_faulty_stadsdelen.BagGeoSearchAPI")
+    def test_update_faulty_stadsdelen_still_faulty(self, mocked_bag_geosearch_api):
+        """
+        Test and assert that spots are not written when the lookup fails again.
+        """
+        mocked_bag_geosearch_api.return_value.get_stadsdeel.return_value = (
+            Spot.Stadsdelen.BagFout
+        )
+        baker.make(
+            Spot,
+            stadsdeel=Spot.Stadsdelen.BagFout,
+            point=Point(4.9, 52.37, srid=4326),
+        )
+
+        version = get_dataset_version()
+
+        with self.assertNumQueries(1):
+            call_command("update_faulty_stadsdelen", rate=0)
+
+        self.assertEqual(get_dataset_version(), version)
@@ -21,3 +21,8 @@ class TestViews(TestCase):
         response = self.client.get("/status/health/")
         self.assertEqual(response.status_code, 500)
         self.assertEqual(response.content, b"Database connectivity failed")
+
+    def test_stadsdeel_cache_view(self):
+        response = self.client.get("/status/health/stadsdeel_cache/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {"hits", "misses", "size"})
@@ -0,0 +1,182 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.test import TestCase
+from model_bakery import baker
+
+from datasets.blackspots.models import EDITED_IMPORT_HASH, Document, ImportedFile, Spot
+from import_process.process_xls import (
+    EXCEL_STRUCTURE,
+    bulk_upsert_spots,
+    get_file_hash,
+    get_sheet_locatie_ids,
+    process_xls,
+    read_rows,
+)
+
+
+class FakeSheet:
+    """
+    Rows of cells by column name, below a header row
+    """
+
+    def __init__(self, rows):
+        self.rows = [None] + rows
+        self.nrows = len(self.rows)
+
+    def cell_value(self, row_idx, column_idx):
+        name = next(
+            name
+            for name, column in EXCEL_STRUCTURE.items()
+            if column["column_idx"] == column_idx
+        )
+        return self.rows[row_idx].get(name, "")
+
+
+class TestBulkImport(TestCase):
+    def get_spot_data(self, locatie_id, description):
+        return {
+            "locatie_id": locatie_id,
+            "actiehouders": "Actiehouders",
+            "spot_type": Spot.SpotType.blackspot,
+            "description": description,
+            "point": Point(4.9239022, 52.3875654),
+            "polygoon": None,
+            "stadsdeel": Spot.Stadsdelen.Centrum,
+            "status": Spot.StatusChoice.gereed,
+            "start_uitvoering": "",
+            "eind_uitvoering": "",
+            "tasks": "",
+            "notes": "",
+            "jaar_blackspotlijst": 2019,
+            "jaar_ongeval_quickscan": None,
+            "jaar_oplevering": None,
+            "jaar_opgenomen_in_ivm_lijst": None,
+        }
+
+    def test_bulk_upsert_spots(self):
+        """
+        Test and assert that new spots are created, existing spots are updated
+        and available documents are linked to the right spots.
+        """
+        baker.make(Spot, locatie_id="B1", description="old description")
+        rows = [
+            (self.get_spot_data("B1", "new description"), None, None),
+            (self.get_spot_data("B2", "created"), "B2_rapportage.pdf", None),
+        ]
+
+        with self.assertNumQueries(5):
+            bulk_upsert_spots(rows)
+
+        self.assertEqual(Spot.objects.count(), 2)
+        self.assertEqual(
+            Spot.objects.get(locatie_id="B1").description, "new description"
+        )
+        document = Document.objects.get()
+        self.assertEqual(document.filename, "B2_rapportage.pdf")
+        self.assertEqual(document.type, Document.DocumentType.Rapportage)
+        self.assertEqual(document.spot.locatie_id, "B2")
+
+    def test_bulk_upsert_duplicate_locatie_id(self):
+        """
+        Test and assert that a locatie_id occurring twice in the sheet results
+        in a single spot holding the data of the last row.
+        """
+        rows = [
+            (self.get_spot_data("B1", "first"), "", ""),
+            (self.get_spot_data("B1", "second"), "", ""),
+        ]
+
+        bulk_upsert_spots(rows)
+
+        self.assertEqual(Spot.objects.get().description, "second")
+
+    def test_incremental_bulk_upsert(self):
+        """
+        Test and assert that unchanged rows are skipped, changed rows are updated and
+        previously imported spots missing from the sheet are deleted, while spots
+        created through the API are kept.
+        """
+        unchanged_data = self.get_spot_data("B1", "unchanged")
+        unchanged_data["import_hash"] = "hash1"
+        changed_data = self.get_spot_data("B2", "changed")
+        changed_data["import_hash"] = "hash2"
+        baker.make(Spot, locatie_id="B1", description="unchanged", import_hash="hash1")
+        baker.make(Spot, locatie_id="B2", description="old", import_hash="old_hash")
+        baker.make(Spot, locatie_id="B3", import_hash="hash3")
+        baker.make(Spot, locatie_id="api", import_hash=None)
+
+        counts = bulk_upsert_spots(
+            [(unchanged_data, None, None), (changed_data, None, None)],
+            incremental=True,
+        )
+
+        self.assertEqual(
+            counts, {"inserted": 0, "updated": 1, "unchanged": 1, "deleted": 1}
+        )
+        self.assertEqual(Spot.objects.get(locatie_id="B2").description, "changed")
+        self.assertEqual(Spot.objects.get(locatie_id="B2").import_hash, "hash2")
+        self.assertEqual(
+            set(Spot.objects.values_list("locatie_id", flat=True)), {"B1", "B2", "api"}
+        )
+
+    def test_incremental_bulk_upsert_skipped_row(self):
+        """
+        Test and assert that a previously imported spot is kept when its row can no
+        longer be parsed, instead of being deleted as missing from the sheet.
+        """
+        baker.make(Spot, locatie_id="B1", import_hash="hash1")
+        baker.make(Spot, locatie_id="B2", import_hash="hash2")
+        sheet = FakeSheet(
+            [
+                {
+                    "number": locatie_id,
+                    "description": "description",
+                    "type": "B",
+                    "lat": 52.3875654,
+                    "lng": 4.9239022,
+                    "stadsdeel": "A",
+                    "status": status,
+                }
+                for locatie_id, status in [("B1", "gereed"), ("B2", "invalid status")]
+            ]
+        )
+
+        rows = read_rows(sheet, 0, document_list=None)
+        counts = bulk_upsert_spots(
+            rows,
+            incremental=True,
+            sheet_locatie_ids=get_sheet_locatie_ids(sheet),
+        )
+
+        self.assertEqual([spot_data["locatie_id"] for spot_data, _, _ in rows], ["B1"])
+        self.assertEqual(counts["deleted"], 0)
+        self.assertTrue(Spot.objects.filter(locatie_id="B2").exists())
+
+    @mock.patch("import_process.process_xls.open_workbook")
+    def test_incremental_unchanged_file(self, mocked_open_workbook):
+        """
+        Test and assert that an unchanged file is skipped, also when spots were created
+        through the API, unless imported spots were edited through the API since,
+        which are then restored from the sheet.
+        """
+        mocked_open_workbook.side_effect = Exception("file read")
+        with tempfile.NamedTemporaryFile(suffix=".xls") as file:
+            file.write(b"spots")
+            file.flush()
+            ImportedFile.objects.create(
+                name=os.path.basename(file.name),
+                content_hash=get_file_hash(file.name, None),
+            )
+            baker.make(Spot, import_hash="hash1")
+            baker.make(Spot, import_hash=None)
+
+            counts = process_xls(file.name, None, incremental=True)
+            self.assertEqual(counts["unchanged"], 1)
+            mocked_open_workbook.assert_not_called()
+
+            baker.make(Spot, import_hash=EDITED_IMPORT_HASH)
+            with self.assertRaisesMessage(Exception, "file read"):
+                process_xls(file.name, None, incremental=True)
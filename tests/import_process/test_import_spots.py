@@ -0,0 +1,49 @@
+from unittest import mock
+
+from django.test import TestCase
+from model_bakery import baker
+
+from datasets.blackspots.models import Spot
+from import_process.management.commands.import_spots import perform_import
+
+
+class TestPerformImport(TestCase):
+    def import_spot(self, *args, **kwargs):
+        baker.make(Spot, locatie_id="imported")
+
+    @mock.patch("import_process.management.commands.import_spots.check_import")
+    @mock.patch("import_process.management.commands.import_spots.process_xls")
+    def test_atomic_import_rolled_back(self, mocked_process_xls, mocked_check_import):
+        """
+        Test and assert that a failing check after an atomic import restores
+        the data that existed before the import.
+        """
+        baker.make(Spot, locatie_id="existing")
+        mocked_process_xls.side_effect = self.import_spot
+        mocked_check_import.side_effect = Exception("Import failed")
+
+        with self.assertRaises(Exception):
+            perform_import(
+                "/tmp/spots.xls", remove_existing_data=True, bulk=True, atomic=True
+            )
+
+        self.assertEqual(
+            list(Spot.objects.values_list("locatie_id", flat=True)), ["existing"]
+        )
+
+    @mock.patch("import_process.management.commands.import_spots.check_import")
+    @mock.patch("import_process.management.commands.import_spots.process_xls")
+    def test_atomic_import_committed(self, mocked_process_xls, mocked_check_import):
+        """
+        Test and assert that an atomic import replaces the existing data when the
+        check passes.
+        """
+        baker.make(Spot, locatie_id="existing")
+        mocked_process_xls.side_effect = self.import_spot
+
+        perform_import("/tmp/spots.xls", remove_existing_data=True, atomic=True)
+
+        mocked_check_import.assert_called_once()
+        self.assertEqual(
+            list(Spot.objects.values_list("locatie_id", flat=True)), ["imported"]
+        )
@@ -0,0 +1,82 @@
+from unittest import TestCase
+from unittest.mock import Mock
+
+from storage.connection_pool import (
+    ConnectionPool,
+    clear_connection_pools,
+    get_connection_pool,
+)
+
+
+class ConnectionPoolTestCase(TestCase):
+    def setUp(self):
+        clear_connection_pools()
+
+    def test_reuse_connection(self):
+        """
+        Test and assert that a released connection is handed out again instead of
+        creating a new one
+        """
+        create_connection = Mock(side_effect=lambda: Mock(token=None))
+        pool = ConnectionPool()
+
+        with pool.connection(create_connection) as first:
+            pass
+        with pool.connection(create_connection) as second:
+            pass
+
+        self.assertIs(first, second)
+        create_connection.assert_called_once()
+
+    def test_concurrent_connections(self):
+        """
+        Test and assert that a connection in use is never handed out twice
+        """
+        create_connection = Mock(side_effect=lambda: Mock(token=None))
+        pool = ConnectionPool()
+
+        first = pool.acquire(create_connection)
+        second = pool.acquire(create_connection)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(create_connection.call_count, 2)
+
+    def test_share_token(self):
+        """
+        Test and assert that new connections reuse the token of earlier connections,
+        so they do not need to authenticate again
+        """
+        pool = ConnectionPool()
+        authenticated = Mock(url="https://storage/v1", token="token")
+        with pool.connection(Mock(return_value=authenticated)):
+            pass
+
+        new_connection = Mock(url=None, token=None)
+        with pool.connection(Mock()) as reused:
+            pool.acquire(Mock(return_value=new_connection))
+
+        self.assertIs(reused, authenticated)
+        self.assertEqual(new_connection.url, "https://storage/v1")
+        self.assertEqual(new_connection.token, "token")
+
+    def test_close_when_full(self):
+        """
+        Test and assert that connections released to a full pool are closed
+        """
+        pool = ConnectionPool(max_size=1)
+        first = pool.acquire(Mock(return_value=Mock(token=None)))
+        second = pool.acquire(Mock(return_value=Mock(token=None)))
+
+        pool.release(first)
+        pool.release(second)
+
+        first.close.assert_not_called()
+        second.close.assert_called_once()
+
+    def test_get_connection_pool(self):
+        """
+        Test and assert that the same pool is returned for the same config
+        """
+        config = {"USER": "user", "PASSWORD": "password"}
+        self.assertIs(get_connection_pool(config), get_connection_pool(dict(config)))
+        self.assertIsNot(get_connection_pool(config), get_connection_pool({}))
@@ -0,0 +1,134 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from storage.document_cache import DocumentCache
+
+
+class DocumentCacheTestCase(TestCase):
+    headers = {
+        "content-type": "application/pdf",
+        "content-length": "4",
+        "etag": "etag1",
+        "x-timestamp": "1566810535.15081",
+    }
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cache = DocumentCache(temp_dir.name, max_size=10)
+
+    def test_store_and_get(self):
+        """
+        Test and assert that a document is cached after all chunks have been read,
+        together with its object store headers
+        """
+        chunks = self.cache.store("container", "doc.pdf", self.headers, [b"bl", b"ob"])
+        self.assertIsNone(self.cache.get("container", "doc.pdf"))
+        self.assertEqual(b"".join(chunks), b"blob")
+
+        path, headers = self.cache.get("container", "doc.pdf")
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), b"blob")
+        self.assertEqual(
+            headers,
+            {"content-type": "application/pdf", "content-length": "4", "etag": "etag1"},
+        )
+        self.assertIsNone(self.cache.get("container", "other.pdf"))
+
+    def test_is_stale(self):
+        """
+        Test and assert that a document is stale max_age seconds after it was stored
+        or validated
+        """
+        self.cache.max_age = 60
+        b"".join(self.cache.store("container", "doc.pdf", self.headers, [b"blob"]))
+        path, _ = self.cache.get("container", "doc.pdf")
+        self.assertFalse(self.cache.is_stale(path))
+
+        headers_path = path.replace(".data", ".json")
+        os.utime(headers_path, (0, 0))
+        self.assertTrue(self.cache.is_stale(path))
+
+        self.cache.mark_validated(path)
+        self.assertFalse(self.cache.is_stale(path))
+
+    def test_concurrent_store(self):
+        """
+        Test and assert that two writers of the same document do not interfere
+        """
+        first = self.cache.store("container", "doc.pdf", self.headers, [b"bl", b"ob"])
+        second = self.cache.store("container", "doc.pdf", self.headers, [b"bl", b"ob"])
+        self.assertEqual(next(first), b"bl")
+        self.assertEqual(next(second), b"bl")
+
+        self.assertEqual(b"".join(first), b"ob")
+        self.assertEqual(b"".join(second), b"ob")
+
+        path, _ = self.cache.get("container", "doc.pdf")
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), b"blob")
+        self.assertFalse(
+            [
+                name
+                for name in os.listdir(os.path.dirname(path))
+                if name.endswith(".tmp")
+            ]
+        )
+
+    def test_incomplete_store(self):
+        """
+        Test and assert that nothing is cached when the chunks are not read completely
+        """
+        chunks = self.cache.store("container", "doc.pdf", self.headers, [b"bl", b"ob"])
+        next(chunks)
+        chunks.close()
+
+        self.assertIsNone(self.cache.get("container", "doc.pdf"))
+        entry_dir = self.cache.get_entry_dir("container", "doc.pdf")
+        self.assertEqual(os.listdir(entry_dir), [])
+
+    def test_store_without_etag(self):
+        chunks = self.cache.store("container", "doc.pdf", {}, [b"blob"])
+        self.assertEqual(b"".join(chunks), b"blob")
+        self.assertIsNone(self.cache.get("container", "doc.pdf"))
+
+    def test_new_version(self):
+        """
+        Test and assert that storing a new version replaces the old one
+        """
+        list(self.cache.store("container", "doc.pdf", self.headers, [b"old"]))
+        headers = dict(self.headers, etag="etag2")
+        list(self.cache.store("container", "doc.pdf", headers, [b"new"]))
+
+        path, headers = self.cache.get("container", "doc.pdf")
+        self.assertEqual(headers["etag"], "etag2")
+        self.assertEqual(len(os.listdir(os.path.dirname(path))), 2)
+
+    def test_invalidate(self):
+        list(self.cache.store("container", "doc.pdf", self.headers, [b"blob"]))
+        self.cache.invalidate("container", "doc.pdf")
+        self.assertIsNone(self.cache.get("container", "doc.pdf"))
+
+    def test_evict_least_recently_used(self):
+        """
+        Test and assert that the least recently used documents are evicted when the
+        cache exceeds its maximum size
+        """
+        list(self.cache.store("container", "first.pdf", self.headers, [b"1234"]))
+        list(self.cache.store("container", "second.pdf", self.headers, [b"1234"]))
+        first_path, _ = self.cache.get("container", "first.pdf")
+        second_path, _ = self.cache.get("container", "second.pdf")
+        os.utime(first_path, (1, 2))
+        os.utime(second_path, (1, 1))
+
+        list(self.cache.store("container", "third.pdf", self.headers, [b"1234"]))
+
+        self.assertIsNotNone(self.cache.get("container", "first.pdf"))
+        self.assertIsNone(self.cache.get("container", "second.pdf"))
+        self.assertIsNotNone(self.cache.get("container", "third.pdf"))
+
+    def test_disabled(self):
+        cache = DocumentCache(self.cache.directory, max_size=0)
+        list(cache.store("container", "doc.pdf", self.headers, [b"blob"]))
+        self.assertIsNone(cache.get("container", "doc.pdf"))
@@ -1,3 +1,6 @@
+import hashlib
+import os
+import tempfile
 from unittest import TestCase, mock
 from unittest.mock import Mock, mock_open
 
@@ -6,7 +9,9 @@ from django.test import override_settings
 from swiftclient import ClientException, Connection
 
 from datasets.blackspots.models import Document
+from storage.connection_pool import clear_connection_pools
 from storage.object_store import (
+    DOWNLOAD_CHUNK_SIZE,
     DOWNLOAD_DIR,
     WBA_CONTAINER_NAME,
     XLS_OBJECT_NAME,
@@ -15,6 +20,9 @@ from storage.object_store import (
 
 
 class ObjectStoreTestCase(TestCase):
+    def setUp(self):
+        clear_connection_pools()
+
     @mock.patch("storage.object_store.get_connection")
     def test_get_connection(self, mocked_get_connection):
         """
@@ -108,8 +116,15 @@ class ObjectStoreTestCase(TestCase):
         object_name = "object_name_mock"
 
         objstore = ObjectStore(config="this is the config")
-        objstore.get_document(connection, container_name, object_name)
-        connection.get_object.assert_called_with(container_name, object_name)
+        objstore.get_document(
+            connection, container_name, object_name, headers={"Range": "bytes=0-9"}
+        )
+        connection.get_object.assert_called_with(
+            container_name,
+            object_name,
+            resp_chunk_size=DOWNLOAD_CHUNK_SIZE,
+            headers={"Range": "bytes=0-9"},
+        )
 
     @mock.patch("storage.object_store.get_full_container_list")
     def test_get_wba_documents_list(self, mocked_get_full_container_list):
@@ -152,12 +167,15 @@ class ObjectStoreTestCase(TestCase):
             ],
         )
 
+    @mock.patch("storage.object_store.os.replace")
     @mock.patch("storage.object_store.os.makedirs")
     @mock.patch("storage.object_store.os.path.isfile")
     @mock.patch("builtins.open", new_callable=mock_open)
-    def test_get_file_download(self, mocked_file, mocked_isfile, mocked_makedirs):
+    def test_get_file_download(
+        self, mocked_file, mocked_isfile, mocked_makedirs, mocked_replace
+    ):
         connection = Mock()
-        connection.get_object.return_value = [None, "mocked_data"]
+        connection.get_object.return_value = [None, iter(["mocked", "_data"])]
         container_name = "container_name_mock"
         object_name = "object_name_mock"
         path = "path_name_mock"
@@ -178,13 +196,102 @@ class ObjectStoreTestCase(TestCase):
             logs.output,
         )
         connection.get_object.assert_called_with(
+            container_name,
+            f"{path}/{object_name}",
+            resp_chunk_size=DOWNLOAD_CHUNK_SIZE,
+        )
+        output_path = f"{DOWNLOAD_DIR}{container_name}/{path}/{object_name}"
+        temp_path = f"{output_path}.{os.getpid()}.tmp"
+        mocked_file.assert_called_with(temp_path, "wb")
+        mocked_file().write.assert_has_calls([mock.call("mocked"), mock.call("_data")])
+        mocked_replace.assert_called_with(temp_path, output_path)
+        self.assertEqual(return_value, output_path)
+
+    @mock.patch("storage.object_store.os.replace")
+    def test_get_file_download_failure(self, mocked_replace):
+        """
+        Test and assert that an interrupted download removes the temporary file and
+        does not replace the output file
+        """
+
+        def failing_chunks():
+            yield b"mocked"
+            raise ClientException("connection reset")
+
+        connection = Mock()
+        connection.get_object.return_value = [None, failing_chunks()]
+
+        with tempfile.TemporaryDirectory() as download_dir:
+            with mock.patch("storage.object_store.DOWNLOAD_DIR", f"{download_dir}/"):
+                objstore = ObjectStore(config="this is the config")
+                with self.assertRaises(ClientException):
+                    objstore.get_file(connection, "container", "path", "object_name")
+
+            self.assertEqual(os.listdir(f"{download_dir}/container/path"), [])
+        mocked_replace.assert_not_called()
+
+    @mock.patch("storage.object_store.os.makedirs")
+    @mock.patch("storage.object_store.os.path.isfile")
+    @mock.patch("builtins.open", new_callable=mock_open, read_data=b"cached_data")
+    def test_get_file_cached(self, mocked_file, mocked_isfile, mocked_makedirs):
+        """
+        Test and assert that the local copy is reused when its hash matches the
+        ETag of the object
+        """
+        connection = Mock()
+        connection.head_object.return_value = {
+            "etag": hashlib.md5(b"cached_data").hexdigest()
+        }
+        container_name = "container_name_mock"
+        object_name = "object_name_mock"
+        path = "path_name_mock"
+
+        mocked_isfile.return_value = True
+
+        objstore = ObjectStore(config="this is the config")
+        with self.assertLogs(level="INFO") as logs:
+            return_value = objstore.get_file(
+                connection, container_name, path, object_name
+            )
+
+        self.assertIn(
+            "INFO:storage.object_store:Using cached file: path_name_mock/object_name_mock",
+            logs.output,
+        )
+        connection.head_object.assert_called_with(
             container_name, f"{path}/{object_name}"
         )
-        mocked_file().write.assert_called_with("mocked_data")
+        connection.get_object.assert_not_called()
         self.assertEqual(
             return_value, f"{DOWNLOAD_DIR}{container_name}/{path}/{object_name}"
         )
 
+    @mock.patch("storage.object_store.os.replace")
+    @mock.patch("storage.object_store.os.makedirs")
+    @mock.patch("storage.object_store.os.path.isfile")
+    @mock.patch("builtins.open", new_callable=mock_open, read_data=b"cached_data")
+    def test_get_file_changed(
+        self, mocked_file, mocked_isfile, mocked_makedirs, mocked_replace
+    ):
+        """
+        Test and assert that the object is downloaded when its ETag does not match
+        the local copy
+        """
+        connection = Mock()
+        connection.head_object.return_value = {"etag": "other_etag"}
+        connection.get_object.return_value = [None, iter(["mocked_data"])]
+        mocked_isfile.return_value = True
+
+        objstore = ObjectStore(config="this is the config")
+        objstore.get_file(connection, "container_name_mock", "path", "object_name")
+
+        connection.get_object.assert_called_with(
+            "container_name_mock",
+            "path/object_name",
+            resp_chunk_size=DOWNLOAD_CHUNK_SIZE,
+        )
+        mocked_file().write.assert_called_with("mocked_data")
+
     @mock.patch("storage.object_store.ObjectStore.get_file")
     def test_fetch_spots(self, mocked_get_file):
         objstore = ObjectStore(config="this is the config")